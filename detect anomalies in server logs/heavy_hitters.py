@@ -0,0 +1,215 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+# Approximate window rules for logs with very many source IPs. Each fixed bucket is
+# counted with a Count-Min sketch (fixed size, whatever the number of IPs) and a
+# Space-Saving summary of its top k IPs; only a capped set of IPs whose estimate is
+# over the threshold is remembered. When the bucket ends, each of those gets lower and
+# upper count bounds: it is flagged if even the lower bound is over the threshold and
+# reported as possible if only the upper one is. Both structures overestimate, so an IP
+# the exact rules flag is at least possible, unless it fell out of the candidate cap.
+# The flagged lines themselves are collected in a second pass over the log.
+
+MIN_EPSILON, MAX_EPSILON = 1e-5, 1e-4  # Range of the sketch error sized from the first block
+
+class CountMinSketch:
+    """Count-Min sketch (Cormode and Muthukrishnan): `depth` rows of `width` counters and
+    an item's estimate is the smallest of its counters. Never too low, and with
+    probability 1 - delta at most epsilon * total too high."""
+
+    def __init__(self, epsilon, delta):
+        self.width = math.ceil(math.e / epsilon)
+        self.depth = math.ceil(math.log(1 / delta))
+        self.rows = np.arange(self.depth)[:, None]
+        self.table = np.zeros((self.depth, self.width), dtype=np.int64)
+        self.total = 0
+        self.touched = []  # Columns added to since the last clear
+
+    def columns(self, keys):
+        """Counter column of each key in every row (depth x len(keys)), by double hashing one 64-bit hash."""
+        h = pd.util.hash_array(keys)
+        h1, h2 = h & np.uint64(0xFFFFFFFF), (h >> np.uint64(32)) | np.uint64(1)
+        return ((h1 + self.rows.astype(np.uint64) * h2) % np.uint64(self.width)).astype(np.int64)
+
+    def add(self, columns, counts):
+        for row in range(self.depth):
+            np.add.at(self.table[row], columns[row], counts)
+        self.total += int(counts.sum())
+        self.touched.append(columns)
+
+    def estimate(self, columns):
+        return self.table[self.rows, columns].min(axis=0)
+
+    def error(self):
+        """Largest overestimate of an item with probability 1 - delta: e / width (<= epsilon) times the total."""
+        return int(math.e / self.width * self.total)
+
+    def clear(self):
+        for columns in self.touched:
+            self.table[self.rows, columns] = 0
+        self.total = 0
+        self.touched = []
+
+class SpaceSaving:
+    """Space-Saving summary (Metwally, Agrawal and El Abbadi) of the k most frequent items,
+    updated with a batch of distinct items and their counts at a time. A tracked item's
+    true count lies between count - error and count; an untracked item's is at most
+    `floor`, the largest count dropped so far."""
+
+    def __init__(self, k):
+        self.k = k
+        self.clear()
+
+    def clear(self):
+        self.items = np.zeros(0, dtype=object)
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.errors = np.zeros(0, dtype=np.int64)
+        self.floor = 0
+
+    def positions(self, items):
+        """Index of each item among the tracked ones, -1 if untracked."""
+        if not len(self.items):
+            return np.full(len(items), -1)
+        return pd.Index(self.items).get_indexer(items)
+
+    def update(self, items, counts):
+        position = self.positions(items)
+        tracked = position >= 0
+        self.counts[position[tracked]] += counts[tracked]
+        new = ~tracked
+        items = np.concatenate([self.items, items[new]])
+        counts = np.concatenate([self.counts, counts[new] + self.floor])
+        errors = np.concatenate([self.errors, np.full(int(new.sum()), self.floor, dtype=np.int64)])
+        if len(counts) > self.k:
+            order = np.argpartition(-counts, self.k)
+            self.floor = max(self.floor, int(counts[order[self.k:]].max()))
+            keep = order[:self.k]
+            items, counts, errors = items[keep], counts[keep], errors[keep]
+        self.items, self.counts, self.errors = items, counts, errors
+
+    def bounds(self, items):
+        """(tracked mask, lower, upper) count bounds of the tracked ones among `items`."""
+        position = self.positions(items)
+        known = position >= 0
+        counts = self.counts[position[known]]
+        return known, counts - self.errors[position[known]], counts
+
+class SketchWindow:
+    """Approximate counterpart of BucketWindow: per-IP line counts over fixed time buckets
+    kept in a Count-Min sketch and a Space-Saving summary that are reset for each bucket.
+    `finish` ends the counting; the lines of the flagged buckets are then passed to
+    `collect` in a second pass, and `close` returns them with each bucket's estimated
+    count and its largest possible overestimate ('error'). IP buckets that may but need
+    not be over the threshold are left in `possible`, with their count bounds."""
+
+    def __init__(self, minutes, threshold, epsilon, delta, top_k, max_candidates):
+        self.minutes = minutes
+        self.threshold = threshold
+        self.epsilon = epsilon  # None: sized from the first block
+        self.delta = delta
+        self.sketch = None
+        self.top = SpaceSaving(top_k)
+        self.max_candidates = max_candidates
+        self.candidates = {}  # IP -> sketch columns, for IPs of the open bucket with an estimate over the threshold
+        self.open_start = None
+        self.flagged = []
+        self.maybe = []
+        self.keys = self.possible = None
+        self.lines = []
+        self.late = 0  # Lines older than a bucket that was already counted
+        self.saturated = 0  # Buckets whose sketch error reached the threshold
+        self.dropped = 0  # Candidate IPs dropped at the cap
+
+    def size_epsilon(self, buckets, counts, timestamps):
+        """Sketch error for the first block: half the threshold over the largest expected
+        bucket, taken as the largest bucket seen or the block's rate over a whole bucket."""
+        span = (timestamps.max() - timestamps.min()).total_seconds()
+        rate_volume = counts.sum() * self.minutes * 60 / max(span, 1)
+        volume = max(pd.Series(counts).groupby(buckets).sum().max(), rate_volume)
+        return min(max(self.threshold / (2 * volume), MIN_EPSILON), MAX_EPSILON)
+
+    def close_bucket(self):
+        """Bound the counts of the open bucket's candidate IPs: flag those whose lower bound
+        is over the threshold and keep those with only the upper bound over it as possible."""
+        error = self.sketch.error()
+        if error >= self.threshold:
+            self.saturated += 1
+        if self.candidates:
+            ips = np.array(list(self.candidates), dtype=object)
+            upper = self.sketch.estimate(np.column_stack(list(self.candidates.values())))
+            lower = np.maximum(upper - error, 0)
+            known, top_lower, top_upper = self.top.bounds(ips)
+            upper[known] = np.minimum(upper[known], top_upper)
+            lower[known] = np.maximum(lower[known], top_lower)
+            hit = lower > self.threshold
+            self.flagged.extend(zip(ips[hit], [self.open_start] * int(hit.sum()), upper[hit], (upper - lower)[hit]))
+            maybe = ~hit & (upper > self.threshold)
+            self.maybe.extend(zip(ips[maybe], [self.open_start] * int(maybe.sum()), lower[maybe], upper[maybe]))
+        self.sketch.clear()
+        self.top.clear()
+        self.candidates = {}
+
+    def cap_candidates(self):
+        """Keep the half of the candidates with the highest estimates once the cap is passed."""
+        ips = list(self.candidates)
+        estimates = self.sketch.estimate(np.column_stack(list(self.candidates.values())))
+        keep = np.argsort(-estimates, kind='stable')[:self.max_candidates // 2]
+        self.dropped += len(ips) - len(keep)
+        self.candidates = {ips[i]: self.candidates[ips[i]] for i in keep}
+
+    def add(self, rows):
+        bucket = rows['timestamp'].dt.floor(f'{self.minutes}T').rename('bucket')
+        if self.open_start is not None:
+            late = bucket < self.open_start
+            self.late += int(late.sum())
+            rows, bucket = rows[~late], bucket[~late]
+        counts = rows.groupby([bucket, rows['ip']], sort=False).size()
+        if counts.empty:
+            return
+        # Buckets in time order: slices of the counts sorted by bucket
+        buckets = counts.index.get_level_values('bucket').to_numpy()
+        order = np.argsort(buckets, kind='stable')
+        buckets = buckets[order]
+        ips = counts.index.get_level_values('ip').to_numpy(dtype=object)[order]
+        counts = counts.to_numpy()[order]
+        if self.sketch is None:
+            epsilon = self.epsilon or self.size_epsilon(buckets, counts, rows['timestamp'])
+            self.sketch = CountMinSketch(epsilon, self.delta)
+        columns = self.sketch.columns(ips)
+        bounds = np.flatnonzero(buckets[1:] != buckets[:-1]) + 1
+        for begin, end in zip(np.concatenate([[0], bounds]), np.concatenate([bounds, [len(counts)]])):
+            if buckets[begin] != self.open_start:
+                if self.open_start is not None:
+                    self.close_bucket()
+                self.open_start = buckets[begin]
+            self.sketch.add(columns[:, begin:end], counts[begin:end])
+            self.top.update(ips[begin:end], counts[begin:end])
+            over = np.flatnonzero(self.sketch.estimate(columns[:, begin:end]) > self.threshold) + begin
+            self.candidates.update(zip(ips[over], columns[:, over].T))
+            if len(self.candidates) > self.max_candidates:
+                self.cap_candidates()
+
+    def finish(self):
+        """Count the last bucket; returns the number of flagged IP buckets."""
+        if self.open_start is not None:
+            self.close_bucket()
+        self.keys = pd.DataFrame(self.flagged, columns=['ip', 'bucket', 'count', 'error'])
+        self.possible = pd.DataFrame(self.maybe, columns=['ip', 'bucket', 'lower', 'upper'])
+        self.flagged, self.maybe = [], []
+        return len(self.keys)
+
+    def collect(self, rows):
+        """Second pass: keep the lines of a block that fall in a flagged IP bucket."""
+        if self.keys.empty:
+            return
+        rows = rows[['line_number', 'ip']].assign(bucket=rows['timestamp'].dt.floor(f'{self.minutes}T'))
+        self.lines.append(rows.merge(self.keys, on=['ip', 'bucket']))
+
+    def close(self):
+        """Returns the flagged lines ordered by IP, bucket and line."""
+        columns = ['line_number', 'ip', 'bucket', 'count', 'error']
+        flagged = pd.concat(self.lines, ignore_index=True) if self.lines else pd.DataFrame(columns=columns)
+        self.lines = []
+        return flagged.sort_values(['ip', 'bucket', 'line_number'], kind='stable')
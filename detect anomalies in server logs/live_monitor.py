@@ -0,0 +1,303 @@
+import bisect
+import math
+import os
+import re
+import sys
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+from log_analyzer import (BRUTE_FORCE_THRESHOLD, BRUTE_FORCE_WINDOW, ERROR_404, ERROR_LEVELS, FAILED_LOGIN, LOG_PATTERN,
+                          REPEAT_THRESHOLD, REPEAT_WINDOW, TIMESTAMP_FORMAT, message_rules)
+
+LINE_RE = re.compile(LOG_PATTERN)
+POLL_SECONDS = 0.2  # How often a followed file is checked for new lines
+Z_THRESHOLD = 2.0
+MIN_MINUTES = 10  # Closed minutes of history before the frequency rule reports
+MIN_HOURS = 5  # Closed hours with errors before the IQR rule reports
+EMITTED_MEMORY = timedelta(hours=2)  # How long flagged line numbers are remembered for deduplication
+
+class RunningStats:
+    """Online mean and population variance (Welford's algorithm)."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+
+    def zscore(self, x):
+        std = math.sqrt(self.m2 / self.count) if self.count else 0.0
+        return (x - self.mean) / std if std > 0 else 0.0
+
+class P2Quantile:
+    """Streaming estimate of the p-quantile in constant memory (the P-square algorithm of
+    Jain and Chlamtac): five markers whose heights are moved along a parabola as values
+    arrive. Exact, as pandas' linear quantile, until five values have been seen."""
+
+    def __init__(self, p):
+        self.p = p
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    @property
+    def count(self):
+        return self.positions[4] if len(self.heights) == 5 else len(self.heights)
+
+    def add(self, x):
+        h, n = self.heights, self.positions
+        if len(h) < 5:
+            bisect.insort(h, x)
+            return
+        if x < h[0]:
+            h[0] = x
+            k = 0
+        elif x >= h[4]:
+            h[4] = x
+            k = 3
+        else:
+            k = bisect.bisect_right(h, x) - 1
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+        for i in (1, 2, 3):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                q = h[i] + d / (n[i + 1] - n[i - 1]) * ((n[i] - n[i - 1] + d) * (h[i + 1] - h[i]) / (n[i + 1] - n[i]) +
+                                                         (n[i + 1] - n[i] - d) * (h[i] - h[i - 1]) / (n[i] - n[i - 1]))
+                if not h[i - 1] < q < h[i + 1]:
+                    q = h[i] + d * (h[i + d] - h[i]) / (n[i + d] - n[i])
+                h[i] = q
+                n[i] += d
+
+    def value(self):
+        h = self.heights
+        if len(h) == 5 and self.positions[4] > 5:
+            return h[2]
+        if not h:
+            return float('nan')
+        rank = self.p * (len(h) - 1)
+        low = int(rank)
+        return h[low] + (h[min(low + 1, len(h) - 1)] - h[low]) * (rank - low)
+
+class LiveDetector:
+    """The analyzer's rules applied line by line: failed logins and 404s at once, the
+    repeated-IP and brute-force rules over per-IP sliding windows, the per-minute
+    frequency rule against a running mean/variance of earlier minutes, and the hourly
+    error rule against streaming Q1/Q3 estimates of earlier hours. A minute or hour is
+    reported as soon as its count crosses the threshold (quiet minutes when they end),
+    and each line is reported once, with the first reason it was flagged for."""
+
+    def __init__(self):
+        self.line_number = 0
+        self.malformed = 0
+        self.requests = {}  # ip -> deque of (timestamp, line number) in the repeat window
+        self.failed = {}  # ip -> deque of (timestamp, line number) of failed logins in the brute-force window
+        self.window_flagged = {}  # (rule, ip) -> last line number flagged by that window rule
+        self.minute_stats = RunningStats()
+        self.q1, self.q3 = P2Quantile(0.25), P2Quantile(0.75)
+        self.emitted = set()
+        self.emitted_order = deque()
+        self.latest = None
+        self.minute = self.hour = None
+        self.reset_lines()
+
+    def reset_lines(self):
+        """Forget everything that refers to line numbers (the followed file was replaced)."""
+        self.requests.clear()
+        self.failed.clear()
+        self.window_flagged.clear()
+        self.emitted.clear()
+        self.emitted_order.clear()
+        self.minute_lines, self.minute_reason = [], None
+        self.hour_errors, self.hour_reason = [], None
+
+    def flag(self, line_numbers, reason):
+        anomalies = []
+        for n in line_numbers:
+            if n not in self.emitted:
+                self.emitted.add(n)
+                self.emitted_order.append((self.latest, n))
+                anomalies.append((n, reason))
+        return anomalies
+
+    def window_rule(self, rule, windows, ip, timestamp, minutes, threshold):
+        """Add a line to the IP's sliding window; returns the not yet flagged lines of a window over the threshold."""
+        window = windows.setdefault(ip, deque())
+        window.append((timestamp, self.line_number))
+        start = timestamp - timedelta(minutes=minutes)
+        while window[0][0] <= start:
+            window.popleft()
+        if len(window) <= threshold:
+            return [], 0
+        last = self.window_flagged.get((rule, ip), 0)
+        new = []
+        for _, n in reversed(window):
+            if n <= last:
+                break
+            new.append(n)
+        self.window_flagged[(rule, ip)] = self.line_number
+        return new[::-1], len(window)
+
+    def expire_windows(self):
+        """Drop the windows of IPs that have been quiet for longer than the window."""
+        for windows, minutes, rule in ((self.requests, REPEAT_WINDOW, 'repeat'), (self.failed, BRUTE_FORCE_WINDOW, 'brute')):
+            start = self.latest - timedelta(minutes=minutes)
+            for ip in [ip for ip, window in windows.items() if window[-1][0] <= start]:
+                del windows[ip]
+                self.window_flagged.pop((rule, ip), None)
+        while self.emitted_order and self.emitted_order[0][0] < self.latest - EMITTED_MEMORY:
+            self.emitted.discard(self.emitted_order.popleft()[1])
+
+    def close_minute(self):
+        """Report a minute that ended unusually quiet, then add its count to the history."""
+        anomalies = []
+        count = len(self.minute_lines)
+        if self.minute is not None and count:
+            z = self.minute_stats.zscore(count)
+            if self.minute_reason is None and self.minute_stats.count >= MIN_MINUTES and abs(z) > Z_THRESHOLD:
+                anomalies = self.flag(self.minute_lines, f"Unusual log frequency in minute {self.minute} (count: {count}, z-score: {z:.2f})")
+            self.minute_stats.add(count)
+        self.minute_lines, self.minute_reason = [], None
+        return anomalies
+
+    def close_hour(self):
+        count = len(self.hour_errors)
+        if self.hour is not None and count:
+            self.q1.add(count)
+            self.q3.add(count)
+        self.hour_errors, self.hour_reason = [], None
+
+    def feed(self, line_number, line):
+        """Process one log line; returns the (line number, reason) anomalies it completes."""
+        if line_number <= self.line_number:
+            self.reset_lines()
+        self.line_number = line_number
+        match = LINE_RE.match(line)
+        try:
+            timestamp = datetime.strptime(match['timestamp'], TIMESTAMP_FORMAT) if match else None
+        except ValueError:
+            timestamp = None
+        if timestamp is None:
+            self.malformed += 1
+            return []
+        ip, rules = match['ip'], message_rules(match['message'])
+        self.latest = timestamp if self.latest is None else max(self.latest, timestamp)
+        anomalies = []
+
+        minute = timestamp.replace(second=0, microsecond=0)
+        if self.minute is None or minute > self.minute:
+            anomalies += self.close_minute()
+            self.minute = minute
+            self.expire_windows()
+        hour = minute.replace(minute=0)
+        if self.hour is None or hour > self.hour:
+            self.close_hour()
+            self.hour = hour
+
+        # Rules in the batch pipeline's order, so a line keeps the same first reason
+        failed_login = rules & FAILED_LOGIN
+        if failed_login:
+            anomalies += self.flag([line_number], f"Failed login attempt from IP {ip}")
+        lines, count = self.window_rule('repeat', self.requests, ip, timestamp, REPEAT_WINDOW, REPEAT_THRESHOLD)
+        anomalies += self.flag(lines, f"High request frequency from IP {ip} ({count} in {REPEAT_WINDOW} minutes)")
+        if rules & ERROR_404:
+            anomalies += self.flag([line_number], f"404 error from IP {ip}")
+        if failed_login:
+            lines, count = self.window_rule('brute', self.failed, ip, timestamp, BRUTE_FORCE_WINDOW, BRUTE_FORCE_THRESHOLD)
+            plural = 's' if BRUTE_FORCE_WINDOW != 1 else ''
+            anomalies += self.flag(lines, f"Possible brute force attempt from IP {ip} ({count} failed logins in {BRUTE_FORCE_WINDOW} minute{plural})")
+
+        # Frequency: flag the minute as soon as its running count is a high outlier
+        self.minute_lines.append(line_number)
+        if self.minute_reason is None and self.minute_stats.count >= MIN_MINUTES:
+            z = self.minute_stats.zscore(len(self.minute_lines))
+            if z > Z_THRESHOLD:
+                self.minute_reason = f"Unusual log frequency in minute {self.minute} (count: {len(self.minute_lines)}, z-score: {z:.2f})"
+                anomalies += self.flag(self.minute_lines, self.minute_reason)
+        elif self.minute_reason is not None:
+            anomalies += self.flag([line_number], self.minute_reason)
+
+        # Errors: flag the hour as soon as its count is above Q3 + 1.5 * IQR of earlier hours
+        if match['log_level'] in ERROR_LEVELS:
+            self.hour_errors.append(line_number)
+            if self.hour_reason is None and self.q3.count >= MIN_HOURS:
+                q1, q3 = self.q1.value(), self.q3.value()
+                if len(self.hour_errors) > q3 + 1.5 * (q3 - q1):
+                    self.hour_reason = f"High error count in hour {self.hour} (count: {len(self.hour_errors)}, above IQR threshold)"
+                    anomalies += self.flag(self.hour_errors, self.hour_reason)
+            elif self.hour_reason is not None:
+                anomalies += self.flag([line_number], self.hour_reason)
+        return anomalies
+
+    def close(self):
+        """End of input: judge the last minute."""
+        return self.close_minute()
+
+def follow(file_path, from_start=False, poll=POLL_SECONDS):
+    """Yield (line number, line) for lines appended to file_path, like tail -F: partial
+    lines wait for their newline, and a truncated or replaced file is reopened from the
+    start. Existing lines are skipped (but counted) unless from_start."""
+    f = open(file_path, 'r')
+    line_number = 0
+    if not from_start:
+        for _ in f:
+            line_number += 1
+    partial = ''
+    try:
+        while True:
+            line = f.readline()
+            if line:
+                partial += line
+                if partial.endswith('\n'):
+                    line_number += 1
+                    yield line_number, partial
+                    partial = ''
+                continue
+            time.sleep(poll)
+            try:
+                st = os.stat(file_path)
+            except FileNotFoundError:
+                continue
+            if st.st_ino != os.fstat(f.fileno()).st_ino or st.st_size < f.tell():
+                f.close()
+                f = open(file_path, 'r')
+                line_number = 0
+                partial = ''
+    finally:
+        f.close()
+
+def read_stdin():
+    for line_number, line in enumerate(sys.stdin, 1):
+        yield line_number, line
+
+def run_live(file_path, from_start=False, output_file='flagged_anomalies.txt'):
+    """Report anomalies from a followed log file ('-' for stdin) as lines arrive, appending them to output_file."""
+    detector = LiveDetector()
+    lines = read_stdin() if file_path == '-' else follow(file_path, from_start)
+    source = 'stdin' if file_path == '-' else file_path
+    print(f"Watching {source} for anomalies (Ctrl+C to stop)...", flush=True)
+    with open(output_file, 'a') as out:
+        def report(anomalies):
+            for line_number, reason in anomalies:
+                record = f"Line {line_number}: {reason}"
+                print(record, flush=True)
+                out.write(record + '\n')
+            out.flush()
+        try:
+            for line_number, line in lines:
+                report(detector.feed(line_number, line))
+        except KeyboardInterrupt:
+            pass
+        report(detector.close())
+    if detector.malformed:
+        print(f"Skipped {detector.malformed} malformed log lines")
@@ -2,126 +2,444 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
-from datetime import datetime, timedelta
-from collections import Counter
 from scipy.stats import zscore
+import argparse
+import gzip
 import os
+import re
+from functools import partial
 
 # Set plot style
 plt.style.use('seaborn')
 
-def load_logs(file_path):
-    """Load and parse server log file into a DataFrame."""
-    logs = []
-    with open(file_path, 'r') as f:
-        for i, line in enumerate(f, 1):
-            try:
-                timestamp, level, ip, *message = line.strip().split(' ', 3)
-                logs.append({
-                    'line_number': i,
-                    'timestamp': datetime.strptime(timestamp, '%Y-%m-%dT%H:%M:%S'),
-                    'log_level': level,
-                    'ip': ip,
-                    'message': message[0]
-                })
-            except:
-                continue
-    df = pd.DataFrame(logs)
+# Log line format: TIMESTAMP LEVEL IP MESSAGE (surrounding whitespace ignored)
+LOG_PATTERN = r'^\s*(?P<timestamp>\S+) (?P<log_level>\S+) (?P<ip>\S+) (?P<message>.*\S)\s*$'
+TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%S'
+BLOCK_SIZE = 16 * 1024 * 1024  # Characters read per block
+ERROR_LEVELS = ['ERROR', 'CRITICAL']
+# Window rules: more than THRESHOLD lines from one IP within WINDOW minutes
+REPEAT_WINDOW, REPEAT_THRESHOLD = 5, 5
+BRUTE_FORCE_WINDOW, BRUTE_FORCE_THRESHOLD = 1, 3  # Failed logins only
+# Approximate window counts: probability of exceeding the sketch error, IPs tracked exactly, candidate IPs kept per bucket
+SKETCH_DELTA, SKETCH_TOP_K, SKETCH_MAX_CANDIDATES = 0.01, 1000, 10000
+# Message rules: bit -> text matched case-insensitively anywhere in the message
+FAILED_LOGIN, ERROR_404 = 1, 2
+MESSAGE_RULES = {FAILED_LOGIN: 'failed login', ERROR_404: '404'}
+RULE_BITS = {text: bit for bit, text in MESSAGE_RULES.items()}
+# One alternation for all rules; without capture groups re can skip ahead to the rules' first characters
+MESSAGE_RE = re.compile('|'.join(re.escape(text) for text in MESSAGE_RULES.values()))
+
+def read_line_blocks(f, block_size=BLOCK_SIZE):
+    """Yield (first line number, lines) for blocks of whole lines read from f."""
+    line_number = 1
+    rest = ''
+    while True:
+        block = f.read(block_size)
+        if not block:
+            break
+        block = rest + block
+        end = block.rfind('\n')
+        if end < 0:
+            rest = block
+            continue
+        rest = block[end + 1:]
+        lines = block[:end].split('\n')
+        yield line_number, lines
+        line_number += len(lines)
+    if rest:
+        yield line_number, [rest]
+
+def parse_lines(lines, first_line_number):
+    """Extract the fields of a block of lines; returns (records, malformed line count)."""
+    fields = pd.Series(lines, dtype=object).str.extract(LOG_PATTERN)
+    fields.insert(0, 'line_number', np.arange(first_line_number, first_line_number + len(lines)))
+    records = fields.dropna(subset=['timestamp'])
+    return records, len(lines) - len(records)
+
+def finish_records(frames):
+    """Concatenate parsed records and convert their timestamps; returns (df, unparsable timestamp count)."""
+    if frames:
+        df = pd.concat(frames, ignore_index=True)
+    else:
+        df = pd.DataFrame(columns=['line_number', 'timestamp', 'log_level', 'ip', 'message'])
+    df['timestamp'] = pd.to_datetime(df['timestamp'], format=TIMESTAMP_FORMAT, errors='coerce')
+    valid = df['timestamp'].notna()
+    df = df[valid].reset_index(drop=True)
+    df['line_number'] = df['line_number'].astype(np.int64)
     df['minute'] = df['timestamp'].dt.floor('T')
     df['hour'] = df['timestamp'].dt.floor('H')
-    return df
+    return df, int((~valid).sum())
 
-def rule_based_anomalies(df):
-    """Detect anomalies using rule-based methods."""
-    anomalies = []
-    
-    # Rule 1: Failed login attempts
-    failed_logins = df[df['message'].str.contains('Failed login', case=False)]
-    for _, row in failed_logins.iterrows():
-        anomalies.append({
-            'line_number': row['line_number'],
-            'reason': f"Failed login attempt from IP {row['ip']}"
-        })
-    
-    # Rule 2: Repeated IPs (>5 requests in 5 minutes)
-    window = 5  # 5-minute window
-    ip_counts = df.groupby(['ip', pd.Grouper(key='timestamp', freq=f'{window}T')]).size().reset_index(name='count')
-    suspicious_ips = ip_counts[ip_counts['count'] > 5]
-    for _, row in suspicious_ips.iterrows():
-        ip_logs = df[(df['ip'] == row['ip']) & 
-                     (df['timestamp'] >= row['timestamp']) & 
-                     (df['timestamp'] < row['timestamp'] + timedelta(minutes=window))]
-        for _, log in ip_logs.iterrows():
-            anomalies.append({
-                'line_number': log['line_number'],
-                'reason': f"High request frequency from IP {row['ip']} ({row['count']} in {window} minutes)"
-            })
-    
-    # Rule 3: 404 errors
-    errors_404 = df[df['message'].str.contains('404', case=False)]
-    for _, row in errors_404.iterrows():
-        anomalies.append({
-            'line_number': row['line_number'],
-            'reason': f"404 error from IP {row['ip']}"
-        })
-    
-    # Rule 4: Brute force attempts (>3 failed logins from same IP in 1 minute)
-    brute_force = df[df['message'].str.contains('Failed login', case=False)]
-    brute_counts = brute_force.groupby(['ip', pd.Grouper(key='timestamp', freq='1T')]).size().reset_index(name='count')
-    brute_suspects = brute_counts[brute_counts['count'] > 3]
-    for _, row in brute_suspects.iterrows():
-        ip_logs = brute_force[(brute_force['ip'] == row['ip']) & 
-                              (brute_force['timestamp'] >= row['timestamp']) & 
-                              (brute_force['timestamp'] < row['timestamp'] + timedelta(minutes=1))]
-        for _, log in ip_logs.iterrows():
-            anomalies.append({
-                'line_number': log['line_number'],
-                'reason': f"Possible brute force attempt from IP {row['ip']} ({row['count']} failed logins in 1 minute)"
-            })
-    
-    return anomalies
+def open_log(file_path):
+    """Open a log file as text, decompressing .gz files on the fly."""
+    return gzip.open(file_path, 'rt') if file_path.endswith('.gz') else open(file_path, 'r')
+
+def load_logs(file_path):
+    """Load and parse server log file into a DataFrame; returns (df, malformed line count)."""
+    frames = []
+    malformed = 0
+    with open_log(file_path) as f:
+        for first_line_number, lines in read_line_blocks(f):
+            records, bad = parse_lines(lines, first_line_number)
+            frames.append(records)
+            malformed += bad
+    df, bad = finish_records(frames)
+    return df, malformed + bad
+
+def iter_log_chunks(file_path, block_size=BLOCK_SIZE):
+    """Yield (df, malformed line count) for each block of the log file, in file order."""
+    with open_log(file_path) as f:
+        for first_line_number, lines in read_line_blocks(f, block_size):
+            records, bad = parse_lines(lines, first_line_number)
+            df, unparsable = finish_records([records])
+            yield df, bad + unparsable
+
+def message_rules(message):
+    """Bitset of the MESSAGE_RULES one message matches."""
+    rules = 0
+    for match in MESSAGE_RE.finditer(message.lower()):
+        rules |= RULE_BITS[match.group()]
+    return rules
+
+def classify_messages(messages):
+    """Bitsets of the MESSAGE_RULES each message matches (uint8 array aligned with
+    `messages`), from a single regex scan over all the messages joined by newlines."""
+    messages = messages.tolist()
+    lengths = np.fromiter(map(len, messages), dtype=np.int64, count=len(messages))
+    text = '\n'.join(messages).lower()
+    if len(text) != lengths.sum() + max(len(messages) - 1, 0):
+        # A few non-ASCII letters change length when lowercased; lower each message instead
+        messages = [message.lower() for message in messages]
+        lengths = np.fromiter(map(len, messages), dtype=np.int64, count=len(messages))
+        text = '\n'.join(messages)
+    starts = np.zeros(len(messages), dtype=np.int64)
+    np.cumsum(lengths[:-1] + 1, out=starts[1:])
+    rules = np.zeros(len(messages), dtype=np.uint8)
+    matches = [(match.start(), RULE_BITS[match.group()]) for match in MESSAGE_RE.finditer(text)]
+    if matches:
+        positions, bits = np.array(matches, dtype=np.int64).T
+        np.bitwise_or.at(rules, np.searchsorted(starts, positions, side='right') - 1, bits.astype(np.uint8))
+    return rules
+
+# Rule engine: each rule selects rows with vectorised masks or group counts joined back
+# to the rows (transform / merge) and returns a frame of line_number and reason, in the
+# order the rule lists them: rules 2 and 4 by IP, then bucket; statistical rules by minute or hour.
+# Rows from several files carry a 'file' column, which is kept alongside the line number.
+
+def anomaly_frame(rows, reasons):
+    frame = pd.DataFrame({'line_number': rows['line_number'].to_numpy(dtype=np.int64),
+                          'reason': reasons.to_numpy(dtype=object)})
+    if 'file' in rows:
+        frame.insert(0, 'file', rows['file'].to_numpy())
+    return frame
+
+def window_hits(rows, minutes, threshold):
+    """Rows of IPs with more than `threshold` lines in a fixed bucket of `minutes`
+    (as pd.Grouper(freq=...)), with their bucket and count, ordered by IP, bucket and line."""
+    bucket = rows['timestamp'].dt.floor(f'{minutes}T').rename('bucket')
+    counts = rows.groupby([rows['ip'], bucket], observed=True)['line_number'].transform('size')
+    hit = counts > threshold
+    hits = rows.loc[hit, [column for column in ('file', 'ip', 'line_number') if column in rows]]
+    hits = hits.assign(bucket=bucket[hit], count=counts[hit])
+    return hits.sort_values(['ip', 'bucket'] + (['file'] if 'file' in rows else []) + ['line_number'], kind='stable')
+
+def sliding_window_hits(rows, minutes, threshold):
+    """Rows of IPs with more than `threshold` lines in some window [t, t + minutes) that
+    starts at one of their lines, ordered by IP, time and line. Each flagged line gets the
+    count of the latest such window covering it. Sorting dominates, so O(n log n)."""
+    width = pd.Timedelta(minutes=minutes).to_timedelta64()
+    codes, _ = pd.factorize(rows['ip'], sort=True)
+    times, ranks = np.unique(rows['timestamp'].to_numpy(), return_inverse=True)
+    # Sort lines by (IP, time rank); a window ends at the first key at or after (IP, rank of t + width)
+    scale = len(times) + 1
+    keys = codes.astype(np.int64) * scale + ranks
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+    window_ends = np.searchsorted(times, times + width)
+    starts = np.searchsorted(keys, keys)
+    ends = np.searchsorted(keys, keys - ranks[order] + window_ends[ranks[order]])
+    counts = ends - starts
+    # Window ends never decrease along one IP's lines, so a line is flagged exactly when the
+    # latest over-threshold window starting at or before it still covers it
+    latest = np.maximum.accumulate(np.where(counts > threshold, starts, -1))
+    hit = (latest >= 0) & (ends[np.maximum(latest, 0)] > np.arange(len(keys)))
+    ordered = rows.iloc[order]
+    return pd.DataFrame({'ip': ordered['ip'].to_numpy()[hit], 'timestamp': ordered['timestamp'].to_numpy()[hit],
+                         'count': counts[latest[hit]], 'line_number': ordered['line_number'].to_numpy()[hit]})
+
+def estimate_error(hits):
+    """Reason suffix for approximate window counts: how far the count may be too high."""
+    return ", at most " + hits['error'].astype(str) + " above the true count" if 'error' in hits else ""
+
+def possible_anomalies(keys, description, counted):
+    """Reasons for the IP buckets whose sketch bounds straddle a window rule's threshold."""
+    return ("Possible " + description + " from IP " + keys['ip'].astype(str) + " in the bucket starting " +
+            keys['bucket'].map(str) + " (" + keys['lower'].astype(str) + " to " + keys['upper'].astype(str) + " " + counted + ")")
+
+def failed_login_anomalies(rows):
+    return anomaly_frame(rows, "Failed login attempt from IP " + rows['ip'].astype(str))
+
+def repeated_ip_anomalies(hits):
+    return anomaly_frame(hits, "High request frequency from IP " + hits['ip'].astype(str) +
+                         " (" + hits['count'].astype(str) + f" in {REPEAT_WINDOW} minutes" + estimate_error(hits) + ")")
+
+def error_404_anomalies(rows):
+    return anomaly_frame(rows, "404 error from IP " + rows['ip'].astype(str))
+
+def brute_force_anomalies(hits):
+    return anomaly_frame(hits, "Possible brute force attempt from IP " + hits['ip'].astype(str) +
+                         " (" + hits['count'].astype(str) + f" failed logins in {BRUTE_FORCE_WINDOW} minute" +
+                         ("s" if BRUTE_FORCE_WINDOW != 1 else "") + estimate_error(hits) + ")")
+
+def rule_based_anomalies(df, sliding=False):
+    """Detect anomalies using rule-based methods; returns a frame of line_number and reason.
+    With `sliding` the window rules count any window of their width, not fixed buckets."""
+    hits = sliding_window_hits if sliding else window_hits
+    rules = classify_messages(df['message'])
+    failed_logins = df[(rules & FAILED_LOGIN) > 0]
+    errors_404 = df[(rules & ERROR_404) > 0]
+    return pd.concat([
+        # Rule 1: Failed login attempts
+        failed_login_anomalies(failed_logins),
+        # Rule 2: Repeated IPs (>5 requests in 5 minutes)
+        repeated_ip_anomalies(hits(df, REPEAT_WINDOW, REPEAT_THRESHOLD)),
+        # Rule 3: 404 errors
+        error_404_anomalies(errors_404),
+        # Rule 4: Brute force attempts (>3 failed logins from same IP in 1 minute)
+        brute_force_anomalies(hits(failed_logins, BRUTE_FORCE_WINDOW, BRUTE_FORCE_THRESHOLD)),
+    ], ignore_index=True)
+
+def frequency_outliers(minute_counts):
+    """Minutes whose log count has an absolute z-score above 2, from counts indexed by minute."""
+    minute_counts = minute_counts.rename_axis('minute').reset_index(name='count')
+    minute_counts['z_score'] = zscore(minute_counts['count'])
+    return minute_counts[minute_counts['z_score'].abs() > 2]
+
+def error_outliers(error_counts):
+    """Hours whose ERROR/CRITICAL count is above Q3 + 1.5 * IQR, from counts indexed by hour."""
+    error_counts = error_counts.rename_axis('hour').reset_index(name='count')
+    Q1 = error_counts['count'].quantile(0.25)
+    Q3 = error_counts['count'].quantile(0.75)
+    IQR = Q3 - Q1
+    return error_counts[error_counts['count'] > Q3 + 1.5 * IQR]
+
+def outlier_anomalies(rows, outliers, key, reasons):
+    """Rows whose `key` (minute or hour) is an outlier, ordered by key, with its reason."""
+    columns = [column for column in ('file', 'line_number') if column in rows] + [key]
+    if rows.empty or outliers.empty:
+        return anomaly_frame(rows[columns].iloc[:0], pd.Series([], dtype=object))
+    flagged = rows[columns].merge(outliers[[key]].assign(reason=reasons), on=key)
+    flagged = flagged.sort_values(key, kind='stable')
+    return anomaly_frame(flagged, flagged['reason'])
+
+def frequency_anomalies(rows, high_freq):
+    reasons = ("Unusual log frequency in minute " + high_freq['minute'].map(str) +
+               " (count: " + high_freq['count'].map(str) + ", z-score: " + high_freq['z_score'].map('{:.2f}'.format) + ")")
+    return outlier_anomalies(rows, high_freq, 'minute', reasons)
+
+def error_anomalies(rows, outliers):
+    reasons = ("High error count in hour " + outliers['hour'].map(str) +
+               " (count: " + outliers['count'].map(str) + ", above IQR threshold)")
+    return outlier_anomalies(rows, outliers, 'hour', reasons)
 
 def statistical_anomalies(df):
-    """Detect anomalies using statistical methods (z-score for frequency)."""
-    anomalies = []
-    
+    """Detect anomalies using statistical methods (z-score for frequency); returns a frame of line_number and reason."""
     # Frequency per minute
-    minute_counts = df.groupby('minute').size().reset_index(name='count')
-    minute_counts['z_score'] = zscore(minute_counts['count'])
-    high_freq = minute_counts[minute_counts['z_score'].abs() > 2]
-    
-    for _, row in high_freq.iterrows():
-        minute_logs = df[df['minute'] == row['minute']]
-        for _, log in minute_logs.iterrows():
-            anomalies.append({
-                'line_number': log['line_number'],
-                'reason': f"Unusual log frequency in minute {row['minute']} (count: {row['count']}, z-score: {row['z_score']:.2f})"
-            })
+    anomalies = [frequency_anomalies(df, frequency_outliers(df.groupby('minute').size()))]
     
     # IQR-based spike detection for ERROR/CRITICAL logs
-    error_logs = df[df['log_level'].isin(['ERROR', 'CRITICAL'])]
+    error_logs = df[df['log_level'].isin(ERROR_LEVELS)]
     if not error_logs.empty:
-        error_counts = error_logs.groupby('hour').size().reset_index(name='count')
-        Q1 = error_counts['count'].quantile(0.25)
-        Q3 = error_counts['count'].quantile(0.75)
-        IQR = Q3 - Q1
-        outliers = error_counts[error_counts['count'] > Q3 + 1.5 * IQR]
-        for _, row in outliers.iterrows():
-            hour_logs = error_logs[error_logs['hour'] == row['hour']]
-            for _, log in hour_logs.iterrows():
-                anomalies.append({
-                    'line_number': log['line_number'],
-                    'reason': f"High error count in hour {row['hour']} (count: {row['count']}, above IQR threshold)"
-                })
+        anomalies.append(error_anomalies(error_logs, error_outliers(error_logs.groupby('hour').size())))
+    
+    return pd.concat(anomalies, ignore_index=True)
+
+# Chunked mode: the log is processed one block at a time. Rules 1 and 3 flag single
+# lines; rules 2 and 4 count per IP over fixed time buckets and carry the rows of the
+# newest, still-open bucket into the next block; the statistical rules sum per-minute
+# and per-hour counts across blocks, then a second pass collects the outlier lines.
+
+def merge_counts(total, counts):
+    """Add one block's group counts to the running totals."""
+    if total is None:
+        return counts
+    return total.add(counts, fill_value=0).astype(np.int64).sort_index()
+
+# Column types of the row frames passed between blocks and rules, so empty ones still merge and sort
+ROW_DTYPES = {'file': np.int64, 'line_number': np.int64, 'timestamp': 'datetime64[ns]', 'minute': 'datetime64[ns]',
+              'hour': 'datetime64[ns]', 'bucket': 'datetime64[ns]', 'count': np.int64}
+
+def concat_rows(frames, columns):
+    if frames:
+        return pd.concat(frames, ignore_index=True)
+    return pd.DataFrame({column: pd.Series(dtype=ROW_DTYPES.get(column, object)) for column in columns})
+
+class BucketWindow:
+    """Per-IP line counts over fixed time buckets (as pd.Grouper(freq=...)) for blocks of
+    time-ordered lines. Rows of the newest bucket are held back until a later bucket
+    starts, so a bucket that straddles two blocks is still counted once."""
+
+    def __init__(self, minutes, threshold):
+        self.minutes = minutes
+        self.threshold = threshold
+        self.carry = None
+        self.open_start = None
+        self.flagged = []
+        self.late = 0  # Lines older than a bucket that was already counted
+
+    def add(self, rows):
+        rows = rows[['line_number', 'timestamp', 'ip']]
+        if self.open_start is not None:
+            self.late += int((rows['timestamp'] < self.open_start).sum())
+        if self.carry is not None:
+            rows = pd.concat([self.carry, rows], ignore_index=True)
+        if rows.empty:
+            self.carry = rows
+            return
+        bucket = rows['timestamp'].dt.floor(f'{self.minutes}T')
+        newest = bucket.max()
+        self.open_start = newest if self.open_start is None else max(self.open_start, newest)
+        closed = bucket < self.open_start
+        self.carry = rows[~closed]
+        self.flagged.append(window_hits(rows[closed], self.minutes, self.threshold))
+
+    def close(self):
+        """Count the last bucket; returns the flagged lines ordered by IP, bucket and line."""
+        if self.carry is not None and not self.carry.empty:
+            self.flagged.append(window_hits(self.carry, self.minutes, self.threshold))
+        self.carry = None
+        flagged = concat_rows(self.flagged, ['ip', 'bucket', 'count', 'line_number'])
+        return flagged.sort_values(['ip', 'bucket', 'line_number'], kind='stable')
+
+class SlidingWindow:
+    """Sliding-window counterpart of BucketWindow. A line is final once every window that
+    can cover it has ended, i.e. it is at least one width older than the newest line; the
+    last two widths of rows are carried over and counted again with the next block."""
+
+    def __init__(self, minutes, threshold):
+        self.minutes = minutes
+        self.width = pd.Timedelta(minutes=minutes)
+        self.threshold = threshold
+        self.carry = None
+        self.cutoff = None  # Lines up to this time are final
+        self.flagged = []
+        self.late = 0  # Lines older than the cutoff when they arrived
+
+    def final_hits(self, rows, cutoff=None):
+        hits = sliding_window_hits(rows, self.minutes, self.threshold)
+        final = pd.Series(True, index=hits.index)
+        if cutoff is not None:
+            final &= hits['timestamp'] <= cutoff
+        if self.cutoff is not None:
+            final &= hits['timestamp'] > self.cutoff
+        return hits[final]
+
+    def add(self, rows):
+        rows = rows[['line_number', 'timestamp', 'ip']]
+        if self.cutoff is not None:
+            self.late += int((rows['timestamp'] <= self.cutoff).sum())
+        if self.carry is not None:
+            rows = pd.concat([self.carry, rows], ignore_index=True)
+        if rows.empty:
+            self.carry = rows
+            return
+        cutoff = rows['timestamp'].max() - self.width
+        self.flagged.append(self.final_hits(rows, cutoff))
+        self.cutoff = cutoff if self.cutoff is None else max(self.cutoff, cutoff)
+        self.carry = rows[rows['timestamp'] > self.cutoff - self.width]
+
+    def close(self):
+        """Count the remaining windows; returns the flagged lines ordered by IP, time and line."""
+        if self.carry is not None and not self.carry.empty:
+            self.flagged.append(self.final_hits(self.carry))
+        self.carry = None
+        flagged = concat_rows(self.flagged, ['ip', 'timestamp', 'count', 'line_number'])
+        return flagged.sort_values(['ip', 'timestamp', 'line_number'], kind='stable')
+
+def analyze_chunked(file_path, block_size=BLOCK_SIZE, sliding=False, sketch=None):
+    """Run the rule-based and statistical detectors block by block, keeping only window
+    carry-over and mergeable counts in memory. Lines must be in time order for the window
+    rules to match the batch pipeline. With `sketch` (epsilon, delta, top_k and
+    max_candidates of heavy_hitters.SketchWindow) the window rules are counted
+    approximately in fixed-size sketches. Returns (rule anomalies, statistical anomalies,
+    level counts per hour, malformed line count, out-of-order line count, sketch report);
+    the sketch report is None without `sketch`, else a dict of the possible window
+    anomalies' reasons, the buckets whose sketch error reached the threshold and the
+    candidate IPs dropped at the cap."""
+    failed, errors_404 = [], []
+    if sketch is not None:
+        from heavy_hitters import SketchWindow
+        Window = partial(SketchWindow, **sketch)
+    else:
+        Window = SlidingWindow if sliding else BucketWindow
+    repeated = Window(REPEAT_WINDOW, REPEAT_THRESHOLD)
+    brute_force = Window(BRUTE_FORCE_WINDOW, BRUTE_FORCE_THRESHOLD)
+    minute_counts = error_counts = level_counts = None
+    malformed = 0
+    for df, bad in iter_log_chunks(file_path, block_size):
+        malformed += bad
+        rules = classify_messages(df['message'])
+        failed_mask = (rules & FAILED_LOGIN) > 0
+        failed.append(df.loc[failed_mask, ['line_number', 'ip']])
+        errors_404.append(df.loc[(rules & ERROR_404) > 0, ['line_number', 'ip']])
+        repeated.add(df)
+        brute_force.add(df[failed_mask])
+        minute_counts = merge_counts(minute_counts, df.groupby('minute').size())
+        error_counts = merge_counts(error_counts, df[df['log_level'].isin(ERROR_LEVELS)].groupby('hour').size())
+        level_counts = merge_counts(level_counts, df.groupby(['hour', 'log_level']).size())
     
-    return anomalies
+    # Second pass: lines of the outlier minutes and hours, and of the IP buckets flagged by sketches
+    high_freq = frequency_outliers(minute_counts if minute_counts is not None else pd.Series(dtype=np.int64))
+    outliers = error_outliers(error_counts) if error_counts is not None and not error_counts.empty else None
+    collect = sketch is not None and repeated.finish() + brute_force.finish() > 0
+    frequent, errors = [], []
+    if collect or not high_freq.empty or (outliers is not None and not outliers.empty):
+        for df, _ in iter_log_chunks(file_path, block_size):
+            if collect:
+                repeated.collect(df)
+                brute_force.collect(df[(classify_messages(df['message']) & FAILED_LOGIN) > 0])
+            frequent.append(df.loc[df['minute'].isin(high_freq['minute']), ['line_number', 'minute']])
+            if outliers is not None:
+                error_logs = df[df['log_level'].isin(ERROR_LEVELS) & df['hour'].isin(outliers['hour'])]
+                errors.append(error_logs[['line_number', 'hour']])
+    stat_anomalies = [frequency_anomalies(concat_rows(frequent, ['line_number', 'minute']), high_freq)]
+    if outliers is not None:
+        stat_anomalies.append(error_anomalies(concat_rows(errors, ['line_number', 'hour']), outliers))
+    
+    rule_anomalies = pd.concat([
+        failed_login_anomalies(concat_rows(failed, ['line_number', 'ip'])),
+        repeated_ip_anomalies(repeated.close()),
+        error_404_anomalies(concat_rows(errors_404, ['line_number', 'ip'])),
+        brute_force_anomalies(brute_force.close()),
+    ], ignore_index=True)
+    
+    sketch_report = None
+    if sketch is not None:
+        plural = 's' if BRUTE_FORCE_WINDOW != 1 else ''
+        sketch_report = {
+            'possible': pd.concat([
+                possible_anomalies(repeated.possible, "high request frequency", f"in {REPEAT_WINDOW} minutes"),
+                possible_anomalies(brute_force.possible, "brute force attempt", f"failed logins in {BRUTE_FORCE_WINDOW} minute{plural}"),
+            ], ignore_index=True),
+            'saturated': repeated.saturated + brute_force.saturated,
+            'dropped': repeated.dropped + brute_force.dropped,
+        }
+    
+    if level_counts is None:
+        level_counts = pd.Series(dtype=np.int64, index=pd.MultiIndex.from_arrays([[], []], names=['hour', 'log_level']))
+    return (rule_anomalies, pd.concat(stat_anomalies, ignore_index=True), level_counts, malformed,
+            repeated.late + brute_force.late, sketch_report)
 
 def plot_log_levels(df, output_dir='plots'):
     """Plot log level counts over time."""
+    plot_level_counts(df.groupby(['hour', 'log_level']).size(), output_dir)
+
+def plot_level_counts(level_counts, output_dir='plots'):
+    """Plot log level counts over time from counts indexed by (hour, log_level)."""
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
     
-    level_counts = df.groupby(['hour', 'log_level']).size().unstack(fill_value=0)
+    level_counts = level_counts.unstack(fill_value=0)
     plt.figure(figsize=(12, 6))
     for level in level_counts.columns:
         plt.plot(level_counts.index, level_counts[level], label=level, marker='o')
@@ -137,31 +455,105 @@ def plot_log_levels(df, output_dir='plots'):
 def save_anomalies(anomalies, output_file='flagged_anomalies.txt'):
     """Save detected anomalies to a file."""
     with open(output_file, 'w') as f:
-        for anomaly in anomalies:
-            f.write(f"Line {anomaly['line_number']}: {anomaly['reason']}\n")
+        if 'file' in anomalies:
+            f.writelines(f"Line {line_number} ({file}): {reason}\n" for file, line_number, reason
+                         in zip(anomalies['file'], anomalies['line_number'], anomalies['reason']))
+        else:
+            f.writelines(f"Line {line_number}: {reason}\n"
+                         for line_number, reason in zip(anomalies['line_number'], anomalies['reason']))
+
+def save_possible(reasons, output_file='possible_anomalies.txt'):
+    """Save the possible window anomalies of approximate mode, one IP bucket per line."""
+    with open(output_file, 'w') as f:
+        f.writelines(reason + "\n" for reason in reasons)
 
 def main():
     """Main function to run the anomaly detection pipeline."""
-    # Load logs
-    df = load_logs('server_logs.txt')
+    parser = argparse.ArgumentParser(description="Detect anomalies in server logs")
+    parser.add_argument('log_files', nargs='*', default=['server_logs.txt'],
+                        help="Log files or directories to analyze (.gz is decompressed), '-' for stdin with --follow (default: server_logs.txt)")
+    parser.add_argument('--chunked', action='store_true', help="Process the log in fixed-size blocks with bounded memory")
+    parser.add_argument('--chunk-size', type=int, default=BLOCK_SIZE, help=f"Characters per block (default: {BLOCK_SIZE})")
+    parser.add_argument('--sliding', action='store_true', help="Window rules count any window of their width instead of fixed buckets")
+    parser.add_argument('--follow', action='store_true', help="Watch the log as it grows and report anomalies as lines arrive")
+    parser.add_argument('--from-start', action='store_true', help="With --follow, also process the lines already in the file")
+    parser.add_argument('--processes', type=int, default=None, help="Worker processes for several files (default: one per core)")
+    parser.add_argument('--cache', action='store_true', help="Keep parsed records in a columnar cache (<log>.cache/) and parse only new lines")
+    parser.add_argument('--approximate', action='store_true',
+                        help="Block mode with the window rules counted in sketches whose size does not grow with the number of IPs")
+    parser.add_argument('--epsilon', type=float, default=None,
+                        help="With --approximate, largest count error as a fraction of a bucket's lines "
+                             "(default: sized from the first block to keep the error below half the threshold)")
+    parser.add_argument('--delta', type=float, default=SKETCH_DELTA,
+                        help=f"With --approximate, probability of a larger error (default: {SKETCH_DELTA})")
+    parser.add_argument('--top-k', type=int, default=SKETCH_TOP_K,
+                        help=f"With --approximate, busiest IPs per bucket counted with tighter bounds (default: {SKETCH_TOP_K})")
+    parser.add_argument('--max-candidates', type=int, default=SKETCH_MAX_CANDIDATES,
+                        help=f"With --approximate, most IPs per bucket kept as over the threshold (default: {SKETCH_MAX_CANDIDATES})")
+    args = parser.parse_args()
+    multi_file = len(args.log_files) > 1 or os.path.isdir(args.log_files[0])
+    if multi_file and (args.follow or args.sliding):
+        parser.error("--follow and --sliding take a single log file")
+    if args.cache and (multi_file or args.chunked or args.follow):
+        parser.error("--cache takes a single log file and does not combine with --chunked or --follow")
+    if args.approximate and (multi_file or args.sliding or args.follow or args.cache):
+        parser.error("--approximate takes a single log file and does not combine with --sliding, --follow or --cache")
+    if (args.epsilon is not None and not 0 < args.epsilon < 1) or not 0 < args.delta < 1 or min(args.top_k, args.max_candidates) < 1:
+        parser.error("--epsilon and --delta must be between 0 and 1, --top-k and --max-candidates at least 1")
+    args.log_file = args.log_files[0]
+    
+    if args.follow:
+        from live_monitor import run_live
+        run_live(args.log_file, args.from_start)
+        return
     
-    # Detect anomalies
-    rule_anomalies = rule_based_anomalies(df)
-    stat_anomalies = statistical_anomalies(df)
-    all_anomalies = rule_anomalies + stat_anomalies
+    if multi_file:
+        # Parse the files in parallel and merge their partial aggregates
+        from parallel_logs import analyze_files
+        rule_anomalies, stat_anomalies, level_counts, malformed = analyze_files(args.log_files, args.chunk_size, args.processes)
+    elif args.chunked or args.approximate:
+        # Load and detect block by block
+        sketch = None
+        if args.approximate:
+            sketch = dict(epsilon=args.epsilon, delta=args.delta, top_k=args.top_k, max_candidates=args.max_candidates)
+        rule_anomalies, stat_anomalies, level_counts, malformed, late, sketch_report = analyze_chunked(
+            args.log_file, args.chunk_size, args.sliding, sketch)
+        if late:
+            print(f"Warning: {late} lines are out of time order; window rules may differ from a full load")
+        if sketch_report is not None:
+            if sketch_report['saturated']:
+                print(f"Warning: in {sketch_report['saturated']} buckets the sketch error reached the window threshold; "
+                      "pass a smaller --epsilon")
+            if sketch_report['dropped']:
+                print(f"Warning: {sketch_report['dropped']} candidate IPs were dropped at --max-candidates; "
+                      "IPs near the threshold may be missed")
+            if not sketch_report['possible'].empty:
+                save_possible(sketch_report['possible'])
+                print(f"{len(sketch_report['possible'])} IP buckets may be over a window threshold within the sketch error; "
+                      "saved to 'possible_anomalies.txt'")
+    else:
+        # Load logs
+        if args.cache:
+            from log_cache import load_cached
+            df, malformed = load_cached(args.log_file, block_size=args.chunk_size)
+        else:
+            df, malformed = load_logs(args.log_file)
+        
+        # Detect anomalies
+        rule_anomalies = rule_based_anomalies(df, args.sliding)
+        stat_anomalies = statistical_anomalies(df)
+        level_counts = df.groupby(['hour', 'log_level']).size()
+    if malformed:
+        print(f"Skipped {malformed} malformed log lines")
+    all_anomalies = pd.concat([rule_anomalies, stat_anomalies], ignore_index=True)
     
     # Remove duplicates based on line number
-    seen_lines = set()
-    unique_anomalies = []
-    for anomaly in all_anomalies:
-        if anomaly['line_number'] not in seen_lines:
-            unique_anomalies.append(anomaly)
-            seen_lines.add(anomaly['line_number'])
+    unique_anomalies = all_anomalies.drop_duplicates(['file', 'line_number'] if multi_file else 'line_number')
     
     # Print summary
     print(f"Total Anomalies Detected: {len(unique_anomalies)}")
     print("\nSummary by Reason:")
-    reasons = Counter(anomaly['reason'] for anomaly in unique_anomalies)
+    reasons = unique_anomalies.groupby('reason', sort=False).size()
     for reason, count in reasons.items():
         print(f" - {reason}: {count} occurrences")
     
@@ -170,7 +562,7 @@ def main():
     print(f"\nAnomalies saved to 'flagged_anomalies.txt'")
     
     # Plot log levels
-    plot_log_levels(df)
+    plot_level_counts(level_counts)
     print("Plot saved in 'plots/log_levels_over_time.png'")
 
 if __name__ == '__main__':
@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+
+import pyarrow as pa
+
+from log_analyzer import BLOCK_SIZE, finish_records, parse_lines
+
+# Parsed-record cache: Arrow IPC (Feather v2) segments, one per run that found new
+# complete lines, plus an index of how far into the log they reach. Segments are
+# uncompressed so they can be memory-mapped; log_level and ip are dictionary-encoded
+# and come back as pandas categoricals. An unterminated last line is parsed every run
+# but only cached once its newline has arrived.
+
+SCHEMA = pa.schema([
+    ('line_number', pa.int64()),
+    ('timestamp', pa.timestamp('ns')),
+    ('log_level', pa.dictionary(pa.int32(), pa.string())),
+    ('ip', pa.dictionary(pa.int32(), pa.string())),
+    ('message', pa.string()),
+])
+INDEX_FILE = 'index.json'
+HEAD_BYTES = 4096  # Leading bytes hashed to notice a rotated or rewritten log
+MAX_SEGMENTS = 16  # Segments are merged into one beyond this
+
+def default_cache_dir(file_path):
+    return file_path + '.cache'
+
+def head_digest(f, length):
+    f.seek(0)
+    return hashlib.sha256(f.read(length)).hexdigest()
+
+def read_index(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, INDEX_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def write_index(cache_dir, index):
+    path = os.path.join(cache_dir, INDEX_FILE)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(index, f)
+    os.replace(path + '.tmp', path)
+
+def to_table(df):
+    records = df[SCHEMA.names].astype({'log_level': 'category', 'ip': 'category'})
+    return pa.Table.from_pandas(records, schema=SCHEMA, preserve_index=False)
+
+def write_segment(path, table):
+    with pa.OSFile(path, 'wb') as sink:
+        with pa.ipc.new_file(sink, SCHEMA) as writer:
+            writer.write_table(table)
+
+def new_segment(cache_dir, index, table):
+    """Write a table as the next segment; returns its file name."""
+    name = f"{index['next_segment']:06d}.arrow"
+    index['next_segment'] += 1
+    write_segment(os.path.join(cache_dir, name), table)
+    return name
+
+def read_segments(paths):
+    """Memory-map the segments and concatenate them into one table."""
+    tables = []
+    for path in paths:
+        with pa.ipc.open_file(pa.memory_map(path, 'r')) as reader:
+            tables.append(reader.read_all())
+    return pa.concat_tables(tables) if tables else SCHEMA.empty_table()
+
+def read_new_lines(f, offset, block_size=BLOCK_SIZE):
+    """Yield (end offset, lines) for blocks of complete lines after `offset`; an
+    unterminated last line is yielded last with an end offset of None."""
+    f.seek(offset)
+    rest = b''
+    while True:
+        block = f.read(block_size)
+        if not block:
+            break
+        block = rest + block
+        end = block.rfind(b'\n')
+        if end < 0:
+            rest = block
+            continue
+        rest = block[end + 1:]
+        offset += len(block) - len(rest)
+        yield offset, block[:end].decode('utf-8', errors='replace').split('\n')
+    if rest:
+        yield None, [rest.decode('utf-8', errors='replace')]
+
+def load_cached(file_path, cache_dir=None, block_size=BLOCK_SIZE):
+    """Load the log like load_logs, parsing only the bytes added since the last run;
+    returns (df, malformed line count) with categorical log_level and ip columns."""
+    cache_dir = cache_dir or default_cache_dir(file_path)
+    os.makedirs(cache_dir, exist_ok=True)
+    index = read_index(cache_dir)
+    with open(file_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if (index is None or size < index['offset'] or
+                head_digest(f, index['head_length']) != index['head_digest']):
+            for name in index['segments'] if index else []:
+                os.remove(os.path.join(cache_dir, name))
+            index = {'offset': 0, 'lines': 0, 'malformed': 0, 'segments': [], 'next_segment': 0}
+
+        frames, tail_frames = [], []
+        new_lines = tail_malformed = 0
+        offset = index['offset']
+        for end, lines in read_new_lines(f, offset, block_size):
+            records, bad = parse_lines(lines, index['lines'] + new_lines + 1)
+            new_lines += len(lines)
+            if end is None:
+                tail_frames.append(records)
+                tail_malformed += bad
+            else:
+                frames.append(records)
+                index['malformed'] += bad
+                offset = end
+        index['head_length'] = min(HEAD_BYTES, offset)
+        index['head_digest'] = head_digest(f, index['head_length'])
+
+    if frames:
+        new, unparsable = finish_records(frames)
+        index['malformed'] += unparsable
+        index['segments'].append(new_segment(cache_dir, index, to_table(new)))
+    index['lines'] += new_lines - (1 if tail_frames else 0)
+    index['offset'] = offset
+    tail, unparsable = finish_records(tail_frames)
+    tail_malformed += unparsable
+
+    paths = [os.path.join(cache_dir, name) for name in index['segments']]
+    if len(paths) > MAX_SEGMENTS:
+        merged = read_segments(paths).unify_dictionaries().combine_chunks()
+        index['segments'] = [new_segment(cache_dir, index, merged)]
+        write_index(cache_dir, index)
+        for path in paths:
+            os.remove(path)
+        paths = [os.path.join(cache_dir, index['segments'][0])]
+    else:
+        write_index(cache_dir, index)
+
+    table = read_segments(paths)
+    if not tail.empty:
+        table = pa.concat_tables([table, to_table(tail)])
+    df = table.to_pandas()
+    # Sorted categories keep sorting and grouping by IP in string order
+    for column in ('log_level', 'ip'):
+        df[column] = df[column].cat.set_categories(sorted(df[column].cat.categories))
+    df['minute'] = df['timestamp'].dt.floor('T')
+    df['hour'] = df['timestamp'].dt.floor('H')
+    return df, index['malformed'] + tail_malformed
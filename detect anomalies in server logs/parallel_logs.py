@@ -0,0 +1,118 @@
+import os
+from multiprocessing import Pool, cpu_count
+
+import numpy as np
+import pandas as pd
+
+from log_analyzer import (BLOCK_SIZE, BRUTE_FORCE_THRESHOLD, BRUTE_FORCE_WINDOW, ERROR_404, ERROR_LEVELS, FAILED_LOGIN,
+                          REPEAT_THRESHOLD, REPEAT_WINDOW, brute_force_anomalies, classify_messages, concat_rows,
+                          error_404_anomalies, error_anomalies, error_outliers, failed_login_anomalies,
+                          frequency_anomalies, frequency_outliers, iter_log_chunks, merge_counts,
+                          repeated_ip_anomalies, window_hits)
+
+# Multi-file mode, in two parallel passes over the files. Pass 1 returns each file's
+# partial aggregates: per-minute, per-hour error and per-hour level counts, per-IP
+# counts in each repeat-window bucket, and the failed-login and 404 lines (few, and all
+# the brute-force rule needs). The parent sums them and applies the rules; pass 2
+# collects the lines of the flagged IP buckets, minutes and hours.
+
+COUNTS = ['minute', 'error_hour', 'level', 'repeat']
+
+def log_files(paths):
+    """Expand directories to the files in them; files are ordered oldest first (modification time, then name)."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in os.listdir(path)
+                         if not name.startswith('.') and os.path.isfile(os.path.join(path, name)))
+        else:
+            files.append(path)
+    return sorted(files, key=lambda path: (os.path.getmtime(path), path))
+
+def scan_file(task):
+    """Pass 1 worker: parse one file block by block and return its partial aggregates."""
+    file_index, path, block_size = task
+    part = dict.fromkeys(COUNTS)
+    failed, errors_404 = [], []
+    malformed = 0
+    for df, bad in iter_log_chunks(path, block_size):
+        malformed += bad
+        df['file'] = file_index
+        rules = classify_messages(df['message'])
+        failed.append(df.loc[(rules & FAILED_LOGIN) > 0, ['file', 'line_number', 'timestamp', 'ip']])
+        errors_404.append(df.loc[(rules & ERROR_404) > 0, ['file', 'line_number', 'ip']])
+        part['minute'] = merge_counts(part['minute'], df.groupby('minute').size())
+        part['error_hour'] = merge_counts(part['error_hour'], df[df['log_level'].isin(ERROR_LEVELS)].groupby('hour').size())
+        part['level'] = merge_counts(part['level'], df.groupby(['hour', 'log_level']).size())
+        bucket = df['timestamp'].dt.floor(f'{REPEAT_WINDOW}T').rename('bucket')
+        part['repeat'] = merge_counts(part['repeat'], df.groupby([df['ip'], bucket]).size())
+    part['failed'] = concat_rows(failed, ['file', 'line_number', 'timestamp', 'ip'])
+    part['errors_404'] = concat_rows(errors_404, ['file', 'line_number', 'ip'])
+    part['malformed'] = malformed
+    return part
+
+def collect_lines(task):
+    """Pass 2 worker: the lines of one file in flagged repeat buckets, outlier minutes and outlier error hours."""
+    file_index, path, block_size, repeat_keys, minutes, hours = task
+    repeated, frequent, errors = [], [], []
+    for df, _ in iter_log_chunks(path, block_size):
+        df['file'] = file_index
+        if not repeat_keys.empty:
+            rows = df[['file', 'line_number', 'ip']].assign(bucket=df['timestamp'].dt.floor(f'{REPEAT_WINDOW}T'))
+            repeated.append(rows.merge(repeat_keys, on=['ip', 'bucket']))
+        frequent.append(df.loc[df['minute'].isin(minutes), ['file', 'line_number', 'minute']])
+        errors.append(df.loc[df['log_level'].isin(ERROR_LEVELS) & df['hour'].isin(hours), ['file', 'line_number', 'hour']])
+    return (concat_rows(repeated, ['file', 'line_number', 'ip', 'bucket', 'count']),
+            concat_rows(frequent, ['file', 'line_number', 'minute']),
+            concat_rows(errors, ['file', 'line_number', 'hour']))
+
+def analyze_files(paths, block_size=BLOCK_SIZE, processes=None):
+    """Run the rule-based and statistical detectors over several log files (or directories
+    of them) in a process pool. Returns (rule anomalies, statistical anomalies, level
+    counts per hour, malformed line count); anomalies carry the file they come from."""
+    files = log_files(paths)
+    processes = max(1, min(processes or cpu_count(), len(files)))
+    with Pool(processes) as pool:
+        parts = pool.map(scan_file, [(index, path, block_size) for index, path in enumerate(files)], chunksize=1)
+        totals = dict.fromkeys(COUNTS)
+        for part in parts:
+            for name in COUNTS:
+                if part[name] is not None:
+                    totals[name] = merge_counts(totals[name], part[name])
+        failed = concat_rows([part['failed'] for part in parts], ['file', 'line_number', 'timestamp', 'ip'])
+        errors_404 = concat_rows([part['errors_404'] for part in parts], ['file', 'line_number', 'ip'])
+
+        repeat = totals['repeat'] if totals['repeat'] is not None else pd.Series(dtype=np.int64)
+        repeat_keys = repeat[repeat > REPEAT_THRESHOLD].rename('count').reset_index()
+        high_freq = frequency_outliers(totals['minute'] if totals['minute'] is not None else pd.Series(dtype=np.int64))
+        error_counts = totals['error_hour']
+        outliers = error_outliers(error_counts) if error_counts is not None and not error_counts.empty else None
+        hours = outliers['hour'] if outliers is not None else []
+
+        repeated, frequent, errors = [], [], []
+        if not repeat_keys.empty or not high_freq.empty or len(hours):
+            tasks = [(index, path, block_size, repeat_keys, high_freq['minute'], hours) for index, path in enumerate(files)]
+            for part_repeated, part_frequent, part_errors in pool.map(collect_lines, tasks, chunksize=1):
+                repeated.append(part_repeated)
+                frequent.append(part_frequent)
+                errors.append(part_errors)
+
+    repeated = concat_rows(repeated, ['file', 'line_number', 'ip', 'bucket', 'count'])
+    rule_anomalies = pd.concat([
+        failed_login_anomalies(failed),
+        repeated_ip_anomalies(repeated.sort_values(['ip', 'bucket', 'file', 'line_number'], kind='stable')),
+        error_404_anomalies(errors_404),
+        brute_force_anomalies(window_hits(failed, BRUTE_FORCE_WINDOW, BRUTE_FORCE_THRESHOLD)),
+    ], ignore_index=True)
+    stat_anomalies = [frequency_anomalies(concat_rows(frequent, ['file', 'line_number', 'minute']), high_freq)]
+    if outliers is not None:
+        stat_anomalies.append(error_anomalies(concat_rows(errors, ['file', 'line_number', 'hour']), outliers))
+    stat_anomalies = pd.concat(stat_anomalies, ignore_index=True)
+
+    names = np.array(files, dtype=object)
+    for anomalies in (rule_anomalies, stat_anomalies):
+        anomalies['file'] = names[anomalies['file'].to_numpy(dtype=np.int64)]
+    level_counts = totals['level']
+    if level_counts is None:
+        level_counts = pd.Series(dtype=np.int64, index=pd.MultiIndex.from_arrays([[], []], names=['hour', 'log_level']))
+    return rule_anomalies, stat_anomalies, level_counts, sum(part['malformed'] for part in parts)
@@ -0,0 +1,348 @@
+import asyncio
+import concurrent.futures
+import random
+import socket
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from network_scanner import (BANNER_PORTS, COMMON_PORTS, TIMEOUT, check_service, inspect_connection, is_host_alive,
+                             log_message)
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+DEFAULT_CONCURRENCY = 1000
+DEFAULT_HOST_RATE = 100.0
+CHECK_WORKERS = 32
+PORT_WORKERS = 256  # Ports of a single host probed at once
+DISCOVERY_PORTS = [80, 443, 22, 445, 3389]
+MIN_TIMEOUT = 0.05
+MAX_TIMEOUT = 10.0
+
+
+class HostRateLimiter:
+    """Space out connection attempts to each host to at most `rate` per second."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.next_slot: Dict[str, float] = {}
+
+    async def wait(self, ip: str) -> None:
+        """Sleep until the next connection slot for this host."""
+        if not self.interval:
+            return
+        now = asyncio.get_running_loop().time()
+        slot = max(now, self.next_slot.get(ip, now))
+        self.next_slot[ip] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    def forget(self, ip: str) -> None:
+        """Drop the schedule of a host that is finished."""
+        self.next_slot.pop(ip, None)
+
+
+class AdaptiveTimeouts:
+    """Per-host connect timeouts from the smoothed RTT and RTT variance, computed
+    the way TCP computes its retransmission timeout (RFC 6298): handshakes and
+    resets are samples, and the timeout is SRTT + 4 * RTTVAR within [minimum, maximum].
+    Hosts without samples yet use the initial timeout."""
+
+    ALPHA = 1 / 8
+    BETA = 1 / 4
+
+    def __init__(self, initial: float = TIMEOUT, minimum: float = MIN_TIMEOUT, maximum: float = MAX_TIMEOUT):
+        self.initial = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.estimates: Dict[str, Tuple[float, float]] = {}
+
+    def timeout(self, ip: str) -> float:
+        """Current connect timeout for a host."""
+        if ip not in self.estimates:
+            return self.initial
+        srtt, rttvar = self.estimates[ip]
+        return min(self.maximum, max(self.minimum, srtt + 4 * rttvar))
+
+    def sample(self, ip: str, rtt: float) -> None:
+        """Fold one measured round trip into the host's estimate."""
+        if ip not in self.estimates:
+            self.estimates[ip] = (rtt, rtt / 2)
+            return
+        srtt, rttvar = self.estimates[ip]
+        rttvar = (1 - self.BETA) * rttvar + self.BETA * abs(srtt - rtt)
+        srtt = (1 - self.ALPHA) * srtt + self.ALPHA * rtt
+        self.estimates[ip] = (srtt, rttvar)
+
+    def forget(self, ip: str) -> None:
+        """Drop the estimate of a host that is finished."""
+        self.estimates.pop(ip, None)
+
+
+def socket_budget(requested: int) -> int:
+    """Cap the number of concurrent sockets below the process file descriptor limit."""
+    if resource is None:
+        return requested
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    wanted = requested + 64
+    if soft != resource.RLIM_INFINITY and soft < wanted:
+        try:
+            soft = wanted if hard == resource.RLIM_INFINITY else min(wanted, hard)
+            resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+        except (ValueError, OSError):
+            pass
+        soft = resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+    return max(1, min(requested, soft - 64))
+
+
+class ScanLimits:
+    """Controls shared by every probe of a scan: a global cap on connection
+    attempts in flight, a per-host connection rate and, optionally, adaptive
+    per-host timeouts (otherwise each probe uses its fixed timeout)."""
+
+    def __init__(self, concurrency: int = DEFAULT_CONCURRENCY, host_rate: float = DEFAULT_HOST_RATE,
+                 timeouts: Optional[AdaptiveTimeouts] = None):
+        self.concurrency = socket_budget(concurrency)
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        self.limiter = HostRateLimiter(host_rate)
+        self.timeouts = timeouts
+
+    def release(self) -> None:
+        """Free the slot of a connection connect_probe handed back, once it is closed."""
+        self.semaphore.release()
+
+    def forget(self, ip: str) -> None:
+        """Release the per-host state of a host that is finished."""
+        self.limiter.forget(ip)
+        if self.timeouts:
+            self.timeouts.forget(ip)
+
+
+async def for_each(items: Iterable[Any], handler: Callable[[Any], Awaitable[None]], workers: int) -> None:
+    """Run `handler` over a (possibly lazy) iterable with at most `workers` items in
+    progress, so large ranges never create one task per address up front."""
+    iterator = iter(items)
+
+    async def worker() -> None:
+        for item in iterator:
+            await handler(item)
+
+    await asyncio.gather(*(worker() for _ in range(max(1, workers))))
+
+
+async def connect_probe(ip: str, port: int, limits: ScanLimits, timeout: float = TIMEOUT,
+                        keep_open: bool = False, banner_ports: List[int] = BANNER_PORTS
+                        ) -> Tuple[str, Optional[socket.socket], bytes]:
+    """Attempt one TCP connection. Returns (status, sock, banner) where status is
+    "open", "refused" (RST), "timeout" or "error". With `keep_open`, an open
+    connection is handed back as a blocking socket for the service checks,
+    together with the banner read passively on `banner_ports`; it keeps its slot of
+    the global limit until the caller closes it and calls limits.release()."""
+    await limits.limiter.wait(ip)
+    await limits.semaphore.acquire()
+    sock = None
+    try:
+        status, sock, banner = await open_probe(ip, port, limits, timeout, keep_open, banner_ports)
+    finally:
+        if sock is None:
+            limits.semaphore.release()
+    return status, sock, banner
+
+
+async def open_probe(ip: str, port: int, limits: ScanLimits, timeout: float, keep_open: bool,
+                     banner_ports: List[int]) -> Tuple[str, Optional[socket.socket], bytes]:
+    """The connection attempt of connect_probe, made while it holds a slot of the global limit."""
+    loop = asyncio.get_running_loop()
+    # A bare non-blocking socket rather than a stream transport, so nothing is read
+    # ahead of the banner and the connection can be handed over as is
+    try:
+        sock = socket.socket(socket.AF_INET6 if ":" in ip else socket.AF_INET, socket.SOCK_STREAM)
+    except OSError as e:
+        log_message(f"Error scanning {ip}:{port}: {e}")
+        return "error", None, b""
+    sock.setblocking(False)
+    wait = limits.timeouts.timeout(ip) if limits.timeouts else timeout
+    started = loop.time()
+    try:
+        await asyncio.wait_for(loop.sock_connect(sock, (ip, port)), wait)
+    except asyncio.TimeoutError:
+        sock.close()
+        return "timeout", None, b""
+    except ConnectionRefusedError:
+        sock.close()
+        if limits.timeouts:
+            limits.timeouts.sample(ip, loop.time() - started)
+        return "refused", None, b""
+    except OSError as e:
+        sock.close()
+        log_message(f"Error scanning {ip}:{port}: {e}")
+        return "error", None, b""
+    except asyncio.CancelledError:
+        sock.close()
+        raise
+    if limits.timeouts:
+        limits.timeouts.sample(ip, loop.time() - started)
+    if not keep_open:
+        sock.close()
+        return "open", None, b""
+    banner = b""
+    if port in banner_ports:
+        try:
+            banner = await asyncio.wait_for(loop.sock_recv(sock, 1024), timeout)
+        except (asyncio.TimeoutError, OSError):
+            pass
+        except asyncio.CancelledError:
+            sock.close()
+            raise
+    sock.settimeout(max(timeout, wait))
+    return "open", sock, banner
+
+
+async def is_host_alive_async(ip: str, limits: ScanLimits, ports: List[int] = DISCOVERY_PORTS,
+                              timeout: float = TIMEOUT) -> bool:
+    """TCP host discovery: any completed handshake or RST means the host is up."""
+    probes = [asyncio.ensure_future(connect_probe(ip, port, limits, timeout)) for port in ports]
+    try:
+        for probe in asyncio.as_completed(probes):
+            status, _, _ = await probe
+            if status in ("open", "refused"):
+                return True
+        return False
+    finally:
+        for probe in probes:
+            probe.cancel()
+
+
+async def discover_hosts_async(ips: Iterable[str], limits: ScanLimits, ports: List[int] = DISCOVERY_PORTS,
+                               timeout: float = TIMEOUT,
+                               on_probe_done: Optional[Callable[[str, bool], None]] = None) -> List[str]:
+    """Return the live hosts among `ips` using TCP connect probes only (no ping subprocesses)."""
+    live_ips: List[str] = []
+
+    async def probe_host(ip: str) -> None:
+        alive = await is_host_alive_async(ip, limits, ports, timeout)
+        if alive:
+            live_ips.append(ip)
+        if on_probe_done:
+            on_probe_done(ip, alive)
+
+    await for_each(ips, probe_host, limits.concurrency)
+    return live_ips
+
+
+def host_workers(limits: ScanLimits, ports: List[int]) -> int:
+    """Hosts to port scan at once so that their port probes can fill the global limit."""
+    return max(1, limits.concurrency // max(1, min(len(ports), PORT_WORKERS)))
+
+
+async def scan_one_host(ip: str, limits: ScanLimits, executor: concurrent.futures.Executor,
+                        ports: List[int] = COMMON_PORTS, timeout: float = TIMEOUT, randomize: bool = False,
+                        on_port_done: Optional[Callable[[str, int, Optional[Dict[str, str]]], None]] = None,
+                        reuse: Optional[Callable[[str, int, bytes], Optional[Dict[str, str]]]] = None,
+                        banner_ports: List[int] = BANNER_PORTS) -> List[Dict[str, str]]:
+    """Probe every port of one host (in random order with `randomize`) and run the
+    service checks on the open ones as they are found. `reuse(ip, port, banner)` may
+    return an earlier result row for an open port, in which case its check is skipped."""
+    loop = asyncio.get_running_loop()
+    results = []
+
+    async def probe(port: int) -> None:
+        status, sock, banner = await connect_probe(ip, port, limits, timeout, True, banner_ports)
+        result = None
+        if status == "open":
+            # The connection keeps its slot of the global limit while it waits for and runs its check
+            try:
+                result = reuse(ip, port, banner) if reuse else None
+                if result is not None:
+                    sock.close()
+                elif banner and port not in BANNER_PORTS:
+                    # The passive read consumed data this check reads itself, so it reconnects
+                    sock.close()
+                    result = await loop.run_in_executor(executor, check_service, ip, port, None, banner)
+                else:
+                    result = await loop.run_in_executor(executor, inspect_connection, ip, port, sock, banner)
+            finally:
+                limits.release()
+            results.append(result)
+        if on_port_done:
+            on_port_done(ip, port, result)
+
+    order = random.sample(ports, len(ports)) if randomize else ports
+    await for_each(order, probe, min(len(order), PORT_WORKERS))
+    return results
+
+
+async def scan_hosts_async(ips: Iterable[str], limits: ScanLimits, ports: List[int] = COMMON_PORTS,
+                           timeout: float = TIMEOUT, randomize: bool = False,
+                           on_host_done: Optional[Callable[[str], None]] = None, sink=None) -> List[Dict[str, str]]:
+    """Scan every port of every host concurrently and run the service checks on open ports.
+    With a result_sink.ResultSink, ports it has recorded as done are skipped and progress is reported to it."""
+    results: List[Dict[str, str]] = []
+
+    # The service checks are blocking socket/HTTP code, so they run on a small thread pool
+    with concurrent.futures.ThreadPoolExecutor(max_workers=CHECK_WORKERS) as executor:
+        async def scan_host(ip: str) -> None:
+            pending = sink.pending_ports(ip, ports) if sink else ports
+            results.extend(await scan_one_host(ip, limits, executor, pending, timeout, randomize,
+                                               sink.port_done if sink else None))
+            if sink:
+                sink.host_done(ip)
+            limits.forget(ip)
+            if on_host_done:
+                on_host_done(ip)
+
+        await for_each(ips, scan_host, host_workers(limits, ports))
+    return results
+
+
+async def sweep_async(ips: Iterable[str], limits: ScanLimits, discovery: str = "tcp",
+                      discovery_ports: List[int] = DISCOVERY_PORTS, ports: List[int] = COMMON_PORTS,
+                      timeout: float = TIMEOUT, randomize: bool = False,
+                      on_host_done: Optional[Callable[[str, bool, List[Dict[str, str]]], None]] = None,
+                      checkpoint=None) -> None:
+    """Discover and scan hosts as a single pipeline: each address is probed for
+    liveness and, if up, port scanned straight away. Results go to `on_host_done`.
+    Ports a result_sink.Checkpoint has recorded as done are skipped. Discovery runs
+    as many hosts at once as the global limit, port scans only host_workers of them."""
+    loop = asyncio.get_running_loop()
+    scanning = asyncio.Semaphore(host_workers(limits, ports))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=CHECK_WORKERS) as executor:
+        async def sweep_host(ip: str) -> None:
+            if discovery == "tcp":
+                alive = await is_host_alive_async(ip, limits, discovery_ports, timeout)
+            else:
+                alive = await loop.run_in_executor(executor, is_host_alive, ip)
+            results = []
+            if alive:
+                pending = checkpoint.pending_ports(ip, ports) if checkpoint else ports
+                async with scanning:
+                    results = await scan_one_host(ip, limits, executor, pending, timeout, randomize)
+            limits.forget(ip)
+            if on_host_done:
+                on_host_done(ip, alive, results)
+
+        await for_each(ips, sweep_host, limits.concurrency)
+
+
+def discover_hosts(ips: Iterable[str], ports: List[int] = DISCOVERY_PORTS,
+                   concurrency: int = DEFAULT_CONCURRENCY, host_rate: float = DEFAULT_HOST_RATE,
+                   timeout: float = TIMEOUT, timeouts: Optional[AdaptiveTimeouts] = None,
+                   on_probe_done: Optional[Callable[[str, bool], None]] = None) -> List[str]:
+    """Run TCP host discovery to completion from synchronous code. Pass the same
+    `timeouts` to scan_hosts afterwards to reuse the RTTs measured here."""
+    async def run() -> List[str]:
+        limits = ScanLimits(concurrency, host_rate, timeouts)
+        return await discover_hosts_async(ips, limits, ports, timeout, on_probe_done)
+    return asyncio.run(run())
+
+
+def scan_hosts(ips: Iterable[str], ports: List[int] = COMMON_PORTS,
+               concurrency: int = DEFAULT_CONCURRENCY, host_rate: float = DEFAULT_HOST_RATE,
+               timeout: float = TIMEOUT, timeouts: Optional[AdaptiveTimeouts] = None, randomize: bool = False,
+               on_host_done: Optional[Callable[[str], None]] = None, sink=None) -> List[Dict[str, str]]:
+    """Run the asyncio engine to completion from synchronous code."""
+    async def run() -> List[Dict[str, str]]:
+        limits = ScanLimits(concurrency, host_rate, timeouts)
+        return await scan_hosts_async(ips, limits, ports, timeout, randomize, on_host_done, sink)
+    return asyncio.run(run())
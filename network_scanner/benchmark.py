@@ -0,0 +1,239 @@
+import argparse
+import asyncio
+import concurrent.futures
+import multiprocessing
+import os
+import shutil
+import socket
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional
+
+from network_scanner import COLOR_GREEN, COLOR_RED, COLOR_RESET, COLOR_YELLOW, COMMON_PORTS, TIMEOUT, parse_ports, scan_host
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+# Stand-in services on every benchmark address. Filtered ports complete no handshake
+# (their listen backlog is kept full, so the kernel drops new SYNs), slow hosts answer late.
+SERVICE_PORTS = {21: "ftp", 22: "ssh", 23: "telnet", 80: "http", 443: "tls", 445: "smb", 8080: "http"}
+FILTERED_PORTS = [3389, 5900]
+
+
+async def serve_ftp(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, anonymous: bool) -> None:
+    writer.write(b"220-Benchmark FTP\r\n220 Ready\r\n")
+    await writer.drain()
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        command = line.split(b" ", 1)[0].strip().upper()
+        if command == b"USER":
+            writer.write(b"331 Password required\r\n")
+        elif command == b"PASS":
+            writer.write(b"230 Logged in\r\n" if anonymous else b"530 Login incorrect\r\n")
+        elif command == b"QUIT":
+            writer.write(b"221 Bye\r\n")
+            await writer.drain()
+            break
+        else:
+            writer.write(b"502 Not implemented\r\n")
+        await writer.drain()
+
+
+async def serve_http(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    await reader.readuntil(b"\r\n\r\n")
+    writer.write(b"HTTP/1.1 200 OK\r\nServer: Apache/2.4.41 (Ubuntu)\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+    await writer.drain()
+
+
+def service_handler(kind: str, host_index: int, delay: float):
+    """Connection callback for one stand-in service."""
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            if delay:
+                await asyncio.sleep(delay)
+            if kind == "ftp":
+                await serve_ftp(reader, writer, anonymous=host_index % 2 == 0)
+            elif kind == "ssh":
+                writer.write(b"SSH-2.0-OpenSSH_8.9p1 Ubuntu-3\r\n")
+                await writer.drain()
+                await reader.read(1024)
+            elif kind == "telnet":
+                writer.write(b"\xff\xfd\x18\xff\xfd\x20Ubuntu 22.04 LTS\r\nlogin: ")
+                await writer.drain()
+                await reader.read(1024)
+            elif kind == "http":
+                await serve_http(reader, writer)
+            else:
+                await reader.read(1024)  # SMB and TLS: hold the connection until the client leaves
+        except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        finally:
+            writer.close()
+    return handle
+
+
+def make_tls_context(workdir: str) -> Optional[ssl.SSLContext]:
+    """Self-signed certificate for the TLS stand-in (needs the openssl command)."""
+    if not shutil.which("openssl"):
+        return None
+    cert, key = os.path.join(workdir, "cert.pem"), os.path.join(workdir, "key.pem")
+    subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-keyout", key, "-out", cert,
+                    "-days", "1", "-subj", "/CN=benchmark"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(cert, key)
+    return context
+
+
+def blackhole(ip: str, port: int) -> List[socket.socket]:
+    """A listener whose accept queue is full, so further connection attempts time out."""
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind((ip, port))
+    listener.listen(0)
+    fillers = []
+    for _ in range(4):
+        filler = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        filler.setblocking(False)
+        filler.connect_ex((ip, port))
+        fillers.append(filler)
+    time.sleep(0.05)
+    return [listener] + fillers
+
+
+def run_services(ips: List[str], slow_every: int, delay: float, ready: multiprocessing.Event,
+                 stop: multiprocessing.Event, expected: multiprocessing.Queue) -> None:
+    """Service process: start every stand-in listener, report which ports are open, serve until stopped."""
+    if resource is not None:
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+    async def main() -> None:
+        with tempfile.TemporaryDirectory() as workdir:
+            tls = make_tls_context(workdir)
+            servers, holes, open_ports = [], [], []
+            for index, ip in enumerate(ips):
+                host_delay = delay if slow_every and index % slow_every == slow_every - 1 else 0.0
+                for port, kind in SERVICE_PORTS.items():
+                    if kind == "tls" and tls is None:
+                        continue
+                    try:
+                        servers.append(await asyncio.start_server(service_handler(kind, index, host_delay), ip, port,
+                                                                  ssl=tls if kind == "tls" else None, reuse_address=True))
+                        open_ports.append((ip, port))
+                    except OSError as e:
+                        print(f"{COLOR_RED}Cannot listen on {ip}:{port}: {e}{COLOR_RESET}")
+                for port in FILTERED_PORTS:
+                    try:
+                        holes.extend(blackhole(ip, port))
+                    except OSError as e:
+                        print(f"{COLOR_RED}Cannot listen on {ip}:{port}: {e}{COLOR_RESET}")
+            expected.put(open_ports)
+            ready.set()
+            while not stop.is_set():
+                await asyncio.sleep(0.1)
+            for server in servers:
+                server.close()
+            for hole in holes:
+                hole.close()
+
+    asyncio.run(main())
+
+
+class SocketSampler(threading.Thread):
+    """Samples the number of open sockets of this process to find the peak."""
+
+    def __init__(self, interval: float = 0.005):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = 0
+        self.running = True
+
+    def count(self) -> int:
+        fd_dir = "/proc/self/fd"
+        total = 0
+        for fd in os.listdir(fd_dir):
+            try:
+                total += os.readlink(os.path.join(fd_dir, fd)).startswith("socket:")
+            except OSError:
+                pass
+        return total
+
+    def run(self) -> None:
+        while self.running:
+            self.peak = max(self.peak, self.count())
+            time.sleep(self.interval)
+
+    def stop(self) -> int:
+        self.running = False
+        self.join()
+        return self.peak
+
+
+def run_engine(engine: str, ips: List[str], ports: List[int], args: argparse.Namespace) -> List[Dict[str, str]]:
+    """Scan the benchmark addresses with the same engine code paths main uses."""
+    if engine == "async":
+        from async_scanner import AdaptiveTimeouts, scan_hosts
+        timeouts = AdaptiveTimeouts(args.timeout) if args.adaptive_timeout else None
+        return scan_hosts(ips, ports, concurrency=args.concurrency, host_rate=args.host_rate,
+                          timeout=args.timeout, timeouts=timeouts, randomize=args.randomize_ports)
+    results = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(len(ips) * 2, 20)) as executor:
+        for host_results in executor.map(scan_host, ips, [ports] * len(ips)):
+            results.extend(host_results)
+    return results
+
+
+def main():
+    """Benchmark the scan engines against stand-in services on loopback."""
+    parser = argparse.ArgumentParser(description="Benchmark network_scanner engines against loopback stand-in services")
+    parser.add_argument("--engines", default="threads,async", help="Comma-separated engines to run (default: threads,async)")
+    parser.add_argument("--hosts", type=int, default=16, help="Loopback addresses 127.0.0.1 ... 127.0.0.N to serve (default: 16)")
+    parser.add_argument("--ports", type=parse_ports, default=COMMON_PORTS, help="Ports to scan on every address (default: common ports)")
+    parser.add_argument("--slow-every", type=int, default=4, help="Every Nth address answers after --delay, 0 for none (default: 4)")
+    parser.add_argument("--delay", type=float, default=0.2, help="Response delay of slow addresses in seconds (default: 0.2)")
+    parser.add_argument("--concurrency", type=int, default=1000, help="Async engine: connection attempts in flight")
+    parser.add_argument("--host-rate", type=float, default=0.0, help="Async engine: connection attempts per second per host, 0 for no limit")
+    parser.add_argument("--timeout", type=float, default=TIMEOUT, help="Async engine: connect timeout (initial one with --adaptive-timeout)")
+    parser.add_argument("--adaptive-timeout", action="store_true", help="Async engine: RTT-based per-host timeouts")
+    parser.add_argument("--randomize-ports", action="store_true", help="Async engine: random port order per host")
+    args = parser.parse_args()
+
+    ips = [f"127.0.{i // 256}.{i % 256}" for i in range(1, args.hosts + 1)]
+    ready, stop = multiprocessing.Event(), multiprocessing.Event()
+    expected_queue = multiprocessing.Queue()
+    services = multiprocessing.Process(target=run_services, args=(ips, args.slow_every, args.delay, ready, stop, expected_queue))
+    services.start()
+    try:
+        ready.wait(60)
+        expected = {(ip, port) for ip, port in expected_queue.get(timeout=5) if port in args.ports}
+        print(f"{COLOR_YELLOW}Serving {len(ips)} addresses: {len(expected)} open service ports, "
+              f"{len(FILTERED_PORTS) * len(ips)} filtered, every {args.slow_every or '-'}th address {args.delay}s slow{COLOR_RESET}")
+        print(f"{'Engine':>8} {'Ports':>8} {'Time (s)':>9} {'Ports/s':>10} {'Peak sockets':>13} {'Open found':>11}")
+        for engine in args.engines.split(","):
+            sampler = SocketSampler()
+            sampler.start()
+            start_time = time.perf_counter()
+            results = run_engine(engine, ips, args.ports, args)
+            elapsed = time.perf_counter() - start_time
+            peak = sampler.stop()
+            probed = len(ips) * len(args.ports)
+            found = {(r["IP"], int(r["Port"])) for r in results}
+            color = COLOR_GREEN if found >= expected else COLOR_RED
+            print(f"{engine:>8} {probed:>8} {elapsed:>9.2f} {probed / elapsed:>10.0f} {peak:>13} "
+                  f"{color}{len(found & expected):>5}/{len(expected):<5}{COLOR_RESET}")
+    finally:
+        stop.set()
+        services.join(10)
+        if services.is_alive():
+            services.terminate()
+
+
+if __name__ == "__main__":
+    main()
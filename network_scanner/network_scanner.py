@@ -1,15 +1,18 @@
 import socket
+import csv
 import ipaddress
 import concurrent.futures
 import requests
+import http.client
 import ftplib
 import telnetlib
 import ssl
 import time
 import os
+import argparse
 from datetime import datetime
 from tabulate import tabulate
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional, Iterator, Union
 import subprocess
 
 # ANSI color codes for pretty output
@@ -21,12 +24,20 @@ COLOR_RESET = "\033[0m"
 # Constants
 COMMON_PORTS = [21, 22, 23, 25, 53, 80, 110, 135, 139, 143, 443, 445, 993, 995, 1433, 3306, 3389, 5900, 8080, 8443]
 TIMEOUT = 1.0
+BANNER_PORTS = [22, 23]  # Services whose check only needs the banner the server sends first
 LOG_FILE = "scan_log.txt"
+RESULT_FIELDS = ["IP", "Port", "Service", "Severity", "Vulnerabilities"]
+CSV_HEADERS = ["IP Address", "Port", "Service", "Severity", "Vulnerabilities"]
+
+_log_file = None
 
 def log_message(message: str) -> None:
     """Log messages to a file with a timestamp."""
-    with open(LOG_FILE, "a") as f:
-        f.write(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {message}\n")
+    global _log_file
+    if _log_file is None:
+        # Opened once and line buffered, so every message still reaches disk immediately
+        _log_file = open(LOG_FILE, "a", buffering=1)
+    _log_file.write(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {message}\n")
 
 def get_default_subnet() -> str:
     """Attempt to get the default subnet from the system's network configuration."""
@@ -43,15 +54,58 @@ def get_default_subnet() -> str:
     except subprocess.CalledProcessError:
         return "192.168.1.0/24"
 
-def parse_ip_range(ip_range: str) -> List[str]:
-    """Parse an IP range or subnet into a list of IP addresses."""
+Network = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+def parse_network(ip_range: str) -> Optional[Network]:
+    """Parse an IP range or subnet without expanding it."""
     try:
-        network = ipaddress.ip_network(ip_range, strict=False)
-        return [str(ip) for ip in network.hosts()]
+        return ipaddress.ip_network(ip_range, strict=False)
     except ValueError as e:
         log_message(f"Error parsing IP range {ip_range}: {e}")
         print(f"{COLOR_RED}Error: Invalid IP range. Use format like '192.168.1.0/24'.{COLOR_RESET}")
-        return []
+        return None
+
+def host_bounds(network: Network) -> Tuple[int, int]:
+    """First and last usable host address as integers (same set as network.hosts())."""
+    first, last = int(network.network_address), int(network.broadcast_address)
+    if network.num_addresses > 2:
+        first += 1
+        if network.version == 4:
+            last -= 1
+    return first, last
+
+def count_hosts(network: Network) -> int:
+    """Number of addresses iter_hosts yields for the whole network."""
+    first, last = host_bounds(network)
+    return last - first + 1
+
+def iter_hosts(network: Network, shard: int = 0, shards: int = 1) -> Iterator[str]:
+    """Lazily yield host addresses; with `shards` > 1 only every shards-th address,
+    starting at offset `shard`, so each shard gets an interleaved slice of the range."""
+    first, last = host_bounds(network)
+    address = type(network.network_address)
+    for value in range(first + shard, last + 1, shards):
+        yield str(address(value))
+
+def parse_ip_range(ip_range: str) -> List[str]:
+    """Parse an IP range or subnet into a list of IP addresses."""
+    network = parse_network(ip_range)
+    return list(iter_hosts(network)) if network is not None else []
+
+def parse_ports(spec: str) -> List[int]:
+    """Parse a port list such as "22,80,8000-8100" or "all" (1-65535) into sorted unique ports."""
+    if spec.strip().lower() == "all":
+        return list(range(1, 65536))
+    ports = set()
+    try:
+        for part in spec.split(","):
+            low, _, high = part.strip().partition("-")
+            ports.update(range(int(low), int(high or low) + 1))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid port list: {spec}")
+    if not ports or min(ports) < 1 or max(ports) > 65535:
+        raise argparse.ArgumentTypeError(f"ports must be between 1 and 65535: {spec}")
+    return sorted(ports)
 
 def is_host_alive(ip: str) -> bool:
     """Check if a host is alive using a ping (ICMP echo request)."""
@@ -79,58 +133,89 @@ def scan_port(ip: str, port: int) -> Tuple[str, int, str]:
         log_message(f"Error scanning {ip}:{port}: {e}")
         return ip, port, "error"
 
+def read_banner(sock: socket.socket) -> bytes:
+    """Passively read whatever the service sends first on an open connection."""
+    try:
+        return sock.recv(1024)
+    except socket.error:
+        return b""
+
+def format_banner(data: bytes) -> str:
+    """Decode a captured banner for display."""
+    return data.decode("utf-8", errors="ignore").strip()[:100] or "No banner"
+
 def grab_banner(ip: str, port: int) -> str:
     """Attempt to grab a service banner for more detailed info."""
     try:
         sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         sock.settimeout(TIMEOUT)
         sock.connect((ip, port))
-        banner = sock.recv(1024).decode("utf-8", errors="ignore").strip()
+        banner = sock.recv(1024)
         sock.close()
-        return banner[:100] or "No banner"
+        return format_banner(banner)
     except socket.error:
         return "No banner"
 
-def check_ftp_anonymous(ip: str, port: int = 21) -> Tuple[str, str]:
+def check_ftp_anonymous(ip: str, port: int = 21, sock: Optional[socket.socket] = None) -> Tuple[str, str]:
     """Check if FTP allows anonymous login and grab banner."""
     try:
         ftp = ftplib.FTP()
         ftp.set_pasv(True)
-        ftp.connect(ip, port, timeout=TIMEOUT)
+        if sock is None:
+            ftp.connect(ip, port, timeout=TIMEOUT)
+        else:
+            # Adopt the probe's connection; the welcome message is still unread
+            ftp.host, ftp.port, ftp.timeout = ip, port, TIMEOUT
+            ftp.sock, ftp.af = sock, sock.family
+            ftp.file = sock.makefile("r", encoding=ftp.encoding)
+            ftp.welcome = ftp.getresp()
         ftp.login("anonymous", "guest")
         ftp.quit()
-        banner = grab_banner(ip, port)
+        banner = format_banner(ftp.welcome.encode("utf-8"))
         return "High", f"Anonymous FTP login allowed ({banner})"
     except ftplib.all_errors:
         return "Low", "Anonymous FTP login not allowed"
 
-def check_ssh_telnet(ip: str, port: int) -> Tuple[str, str]:
-    """Check if SSH or Telnet is open and grab banner."""
+def check_ssh_telnet(ip: str, port: int, banner: Optional[bytes] = None) -> Tuple[str, str]:
+    """Check if SSH or Telnet is open and grab banner (or use one already captured)."""
     try:
-        banner = grab_banner(ip, port)
+        banner = grab_banner(ip, port) if banner is None else format_banner(banner)
         if "SSH" in banner:
             return "Medium", f"SSH open, version: {banner}"
         return "High", f"Telnet open, version: {banner} (insecure protocol)"
     except socket.error:
         return "Low", "Telnet/SSH not accessible"
 
-def check_http_headers(ip: str, port: int = 80) -> Tuple[str, str]:
+def http_server_header(sock: socket.socket, ip: str, port: int) -> str:
+    """Send a GET over an open connection and return the Server response header."""
+    sock.sendall(f"GET / HTTP/1.1\r\nHost: {ip}:{port}\r\nConnection: close\r\n\r\n".encode("ascii"))
+    response = http.client.HTTPResponse(sock, method="GET")
+    response.begin()
+    return response.getheader("Server", "Unknown")
+
+def check_http_headers(ip: str, port: int = 80, sock: Optional[socket.socket] = None) -> Tuple[str, str]:
     """Check HTTP server for info leakage and outdated versions."""
     try:
-        url = f"http://{ip}:{port}"
-        response = requests.get(url, timeout=TIMEOUT, allow_redirects=False)
-        server = response.headers.get("Server", "Unknown")
+        if sock is None:
+            url = f"http://{ip}:{port}"
+            response = requests.get(url, timeout=TIMEOUT, allow_redirects=False)
+            server = response.headers.get("Server", "Unknown")
+        else:
+            server = http_server_header(sock, ip, port)
         if server != "Unknown":
             # Simplified check for outdated versions
             if "Apache" in server and any(v in server for v in ["2.2", "2.4.0"]):
                 return "High", f"Outdated HTTP server: {server}"
             return "Medium", f"HTTP server leaks info: {server}"
         return "Low", "No HTTP server info leaked"
-    except requests.RequestException:
+    except (requests.RequestException, http.client.HTTPException, socket.error):
         return "Low", "HTTP server not accessible"
 
-def check_smb(ip: str) -> Tuple[str, str]:
+def check_smb(ip: str, sock: Optional[socket.socket] = None) -> Tuple[str, str]:
     """Check for open SMB shares."""
+    if sock is not None:
+        # The probe already completed a connection to port 445
+        return "High", "SMB share open (potential unauthenticated access)"
     try:
         sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         sock.settimeout(TIMEOUT)
@@ -142,11 +227,11 @@ def check_smb(ip: str) -> Tuple[str, str]:
     except socket.error:
         return "Low", "SMB check error"
 
-def check_ssl_cert(ip: str, port: int = 443) -> Tuple[str, str]:
+def check_ssl_cert(ip: str, port: int = 443, sock: Optional[socket.socket] = None) -> Tuple[str, str]:
     """Check for weak or self-signed SSL certificates."""
     try:
         context = ssl.create_default_context()
-        with socket.create_connection((ip, port), timeout=TIMEOUT) as sock:
+        with sock or socket.create_connection((ip, port), timeout=TIMEOUT) as sock:
             with context.wrap_socket(sock, server_hostname=ip) as ssock:
                 cert = ssock.getpeercert()
                 issuer = dict(x[0] for x in cert.get("issuer", []))
@@ -159,30 +244,54 @@ def check_ssl_cert(ip: str, port: int = 443) -> Tuple[str, str]:
     except (ssl.SSLError, socket.error) as e:
         return "Low", f"SSL check failed: {str(e)}"
 
-def scan_host(ip: str) -> List[Dict[str, str]]:
-    """Scan a single host for open ports and vulnerabilities."""
+def check_service(ip: str, port: int, sock: Optional[socket.socket] = None,
+                  banner: Optional[bytes] = None) -> Dict[str, str]:
+    """Run the vulnerability check for an open port and build its result row.
+    With `sock` (an open connection) and `banner` the checks reuse them instead of reconnecting."""
+    vuln_result = {"IP": ip, "Port": str(port), "Service": get_service_name(port), "Severity": "", "Vulnerabilities": ""}
+    if port == 21:
+        severity, vuln = check_ftp_anonymous(ip, port, sock)
+    elif port in [22, 23]:
+        severity, vuln = check_ssh_telnet(ip, port, banner)
+    elif port in [80, 8080, 8443]:
+        severity, vuln = check_http_headers(ip, port, sock)
+    elif port == 445:
+        severity, vuln = check_smb(ip, sock)
+    elif port == 443:
+        severity, vuln = check_ssl_cert(ip, port, sock)
+    else:
+        severity, vuln = "Low", "No specific vulnerability check implemented"
+    vuln_result["Severity"] = severity
+    vuln_result["Vulnerabilities"] = vuln
+    return vuln_result
+
+def inspect_connection(ip: str, port: int, sock: socket.socket, banner: bytes = b"") -> Dict[str, str]:
+    """Run the service check over an already open connection, then close it."""
+    with sock:
+        return check_service(ip, port, sock, banner)
+
+def probe_port(ip: str, port: int) -> Optional[Dict[str, str]]:
+    """Connect to a port once; if it is open, capture the banner and run the
+    service check on the same connection. Returns None for closed ports."""
+    try:
+        sock = socket.create_connection((ip, port), timeout=TIMEOUT)
+    except socket.error:
+        return None
+    banner = read_banner(sock) if port in BANNER_PORTS else b""
+    return inspect_connection(ip, port, sock, banner)
+
+def scan_host(ip: str, ports: List[int] = COMMON_PORTS, on_port_done=None) -> List[Dict[str, str]]:
+    """Scan a single host for open ports and vulnerabilities.
+    `on_port_done(ip, port, result)` is called as each probe finishes (result is None for closed ports)."""
     results = []
     with concurrent.futures.ThreadPoolExecutor(max_workers=20) as executor:
-        future_to_port = {executor.submit(scan_port, ip, port): port for port in COMMON_PORTS}
+        future_to_port = {executor.submit(probe_port, ip, port): port for port in ports}
         for future in concurrent.futures.as_completed(future_to_port):
-            ip, port, status = future.result()
-            if status == "open":
-                vuln_result = {"IP": ip, "Port": str(port), "Service": get_service_name(port), "Severity": "", "Vulnerabilities": ""}
-                if port == 21:
-                    severity, vuln = check_ftp_anonymous(ip, port)
-                elif port in [22, 23]:
-                    severity, vuln = check_ssh_telnet(ip, port)
-                elif port in [80, 8080, 8443]:
-                    severity, vuln = check_http_headers(ip, port)
-                elif port == 445:
-                    severity, vuln = check_smb(ip)
-                elif port == 443:
-                    severity, vuln = check_ssl_cert(ip, port)
-                else:
-                    severity, vuln = "Low", "No specific vulnerability check implemented"
-                vuln_result["Severity"] = severity
-                vuln_result["Vulnerabilities"] = vuln
-                results.append(vuln_result)
+            result = future.result()
+            if result:
+                results.append(result)
+            if on_port_done:
+                on_port_done(ip, future_to_port[future], result)
     return results
 
 def get_service_name(port: int) -> str:
@@ -205,17 +314,16 @@ def print_progress(current: int, total: int) -> None:
 
 def save_to_csv(results: List[Dict[str, str]], filename: str = "scan_results.csv") -> None:
     """Save scan results to a CSV file."""
-    with open(filename, "w") as f:
-        f.write("IP Address,Port,Service,Severity,Vulnerabilities\n")
-        for result in results:
-            f.write(f"{result['IP']},{result['Port']},{result['Service']},{result['Severity']},\"{result['Vulnerabilities']}\"\n")
+    with open(filename, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_HEADERS)
+        writer.writerows([result[field] for field in RESULT_FIELDS] for result in results)
     print(f"{COLOR_GREEN}Results saved to {filename}{COLOR_RESET}")
 
 def generate_report(results: List[Dict[str, str]]) -> str:
     """Generate a formatted table report from scan results."""
-    table_data = [[r["IP"], r["Port"], r["Service"], r["Severity"], r["Vulnerabilities"]] for r in results]
-    headers = ["IP Address", "Port", "Service", "Severity", "Vulnerabilities"]
-    return tabulate(table_data, headers=headers, tablefmt="fancy_grid")
+    table_data = [[r[field] for field in RESULT_FIELDS] for r in results]
+    return tabulate(table_data, headers=CSV_HEADERS, tablefmt="fancy_grid")
 
 def summarize_results(results: List[Dict[str, str]]) -> str:
     """Generate a summary of vulnerabilities by severity."""
@@ -228,47 +336,167 @@ def summarize_results(results: List[Dict[str, str]]) -> str:
     summary += f"  Low Severity: {severity_counts['Low']}\n"
     return summary
 
+def run_discovery(ip_list: List[str], args: argparse.Namespace, timeouts=None) -> List[str]:
+    """Find the live hosts in a list of addresses with the selected discovery mode."""
+    live_ips = []
+    if args.discovery == "tcp":
+        from async_scanner import discover_hosts
+        probed = []
+        def probe_done(ip: str, alive: bool) -> None:
+            probed.append(ip)
+            print_progress(len(probed), len(ip_list))
+        live_ips = discover_hosts(ip_list, args.discovery_ports, concurrency=args.concurrency, host_rate=args.host_rate,
+                                  timeout=args.timeout, timeouts=timeouts, on_probe_done=probe_done)
+    else:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(len(ip_list), 50)) as executor:
+            future_to_ip = {executor.submit(is_host_alive, ip): ip for ip in ip_list}
+            for i, future in enumerate(concurrent.futures.as_completed(future_to_ip), 1):
+                ip = future_to_ip[future]
+                if future.result():
+                    live_ips.append(ip)
+                print_progress(i, len(ip_list))
+    return live_ips
+
+def run_port_scan(live_ips: List[str], args: argparse.Namespace, timeouts=None, sink=None) -> List[Dict[str, str]]:
+    """Scan the live hosts with the selected engine, streaming results and progress to `sink`."""
+    all_results = []
+    if args.engine == "async" and live_ips:
+        from async_scanner import scan_hosts
+        done = []
+        def host_done(ip: str) -> None:
+            done.append(ip)
+            print_progress(len(done), len(live_ips))
+        all_results = scan_hosts(live_ips, args.ports, concurrency=args.concurrency, host_rate=args.host_rate,
+                                 timeout=args.timeout, timeouts=timeouts, randomize=args.randomize_ports,
+                                 on_host_done=host_done, sink=sink)
+    elif live_ips:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(len(live_ips) * 2, 20)) as executor:
+            future_to_ip = {executor.submit(scan_host, ip, sink.pending_ports(ip, args.ports) if sink else args.ports,
+                                            sink.port_done if sink else None): ip for ip in live_ips}
+            for i, future in enumerate(concurrent.futures.as_completed(future_to_ip), 1):
+                all_results.extend(future.result())
+                if sink:
+                    sink.host_done(future_to_ip[future])
+                print_progress(i, len(live_ips))
+    return all_results
+
 def main():
     """Main function to run the network scanner."""
+    parser = argparse.ArgumentParser(description="Network vulnerability scanner")
+    parser.add_argument("--range", dest="ip_range", help="IP range or subnet to scan (prompted for if omitted)")
+    parser.add_argument("--engine", choices=["threads", "async"], default="threads",
+                        help="Port scanning engine: thread pools or asyncio (default: threads)")
+    parser.add_argument("--discovery", choices=["ping", "tcp"], default="ping",
+                        help="Host discovery: ping subprocesses or async TCP connect probes (default: ping)")
+    parser.add_argument("--discovery-ports", type=lambda value: [int(port) for port in value.split(",")],
+                        default=[80, 443, 22, 445, 3389],
+                        help="TCP discovery: comma-separated ports; a connect or a reset marks the host alive")
+    parser.add_argument("--concurrency", type=int, default=1000,
+                        help="Async engine and TCP discovery: maximum connection attempts in flight (default: 1000)")
+    parser.add_argument("--host-rate", type=float, default=100.0,
+                        help="Async engine and TCP discovery: maximum connection attempts per second per host, 0 for no limit (default: 100)")
+    parser.add_argument("--ports", type=parse_ports, default=COMMON_PORTS,
+                        help='Ports to scan, e.g. "22,80,8000-8100" or "all" for 1-65535 (default: common ports)')
+    parser.add_argument("--randomize-ports", action="store_true",
+                        help="Async engine: probe each host's ports in a random order")
+    parser.add_argument("--timeout", type=float, default=TIMEOUT,
+                        help=f"Async engine and TCP discovery: connect timeout in seconds, or the initial one with "
+                             f"--adaptive-timeout (default: {TIMEOUT})")
+    parser.add_argument("--adaptive-timeout", action="store_true",
+                        help="Async engine and TCP discovery: derive per-host timeouts from measured RTTs (SRTT + 4 * RTTVAR)")
+    parser.add_argument("--output", default="scan_results.csv",
+                        help="Results file, written as results arrive: CSV, or JSON lines if it ends in .jsonl "
+                             "(default: scan_results.csv)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue an interrupted scan: skip work recorded in <output>.checkpoint and append to the output")
+    parser.add_argument("--state",
+                        help="Differential rescan: keep per-host/port state in this SQLite file and only probe what "
+                             "changed or is older than --ttl; checks are skipped when a service banner is unchanged")
+    parser.add_argument("--ttl", type=float, default=3600.0,
+                        help="Differential rescan: seconds a verified host or port stays fresh (default: 3600)")
+    parser.add_argument("--shards", type=int, default=0,
+                        help="Sweep the range lazily in this many worker processes, each discovering and scanning "
+                             "its share with the async engine (default: 0, two-phase scan in this process)")
+    args = parser.parse_args()
+    if args.state and args.shards:
+        parser.error("--state cannot be combined with --shards")
+
     print(f"{COLOR_GREEN}=== Network Vulnerability Scanner ==={COLOR_RESET}")
-    default_subnet = get_default_subnet()
-    ip_range = input(f"Enter IP range or subnet (e.g., 192.168.1.0/24, default: {default_subnet}): ") or default_subnet
+    ip_range = args.ip_range
+    if not ip_range:
+        default_subnet = get_default_subnet()
+        ip_range = input(f"Enter IP range or subnet (e.g., 192.168.1.0/24, default: {default_subnet}): ") or default_subnet
     print(f"{COLOR_YELLOW}Scanning IP range: {ip_range}{COLOR_RESET}")
     log_message(f"Starting scan for {ip_range}")
     start_time = time.time()
 
     # Parse IP range
-    ip_list = parse_ip_range(ip_range)
-    if not ip_list:
+    network = parse_network(ip_range)
+    if network is None:
         print(f"{COLOR_RED}Exiting due to invalid IP range.{COLOR_RESET}")
         return
 
-    # Host discovery
-    print(f"{COLOR_YELLOW}Discovering live hosts...{COLOR_RESET}")
-    live_ips = []
-    with concurrent.futures.ThreadPoolExecutor(max_workers=min(len(ip_list), 50)) as executor:
-        future_to_ip = {executor.submit(is_host_alive, ip): ip for ip in ip_list}
-        for i, future in enumerate(concurrent.futures.as_completed(future_to_ip), 1):
-            ip = future_to_ip[future]
-            if future.result():
-                live_ips.append(ip)
-            print_progress(i, len(ip_list))
-    print(f"\n{COLOR_GREEN}Found {len(live_ips)} live hosts{COLOR_RESET}")
-
-    # Scan live hosts
-    all_results = []
-    with concurrent.futures.ThreadPoolExecutor(max_workers=min(len(live_ips) * 2, 20)) as executor:
-        future_to_ip = {executor.submit(scan_host, ip): ip for ip in live_ips}
-        for i, future in enumerate(concurrent.futures.as_completed(future_to_ip), 1):
-            all_results.extend(future.result())
-            print_progress(i, len(live_ips))
+    from result_sink import ResultSink
+    with ResultSink(args.output, resume=args.resume) as sink:
+        if args.resume:
+            print(f"{COLOR_YELLOW}Resuming: {len(sink.previous_results)} results and "
+                  f"{len(sink.done_hosts)} finished hosts from the previous run{COLOR_RESET}")
+        if args.state:
+            # Differential rescan with the async engine against the stored scan state
+            from scan_state import ScanState, rescan
+            state = ScanState(args.state, args.ttl)
+            timeouts = None
+            if args.adaptive_timeout:
+                from async_scanner import AdaptiveTimeouts
+                timeouts = AdaptiveTimeouts(args.timeout)
+            print(f"{COLOR_YELLOW}Rescanning changed and stale hosts (TTL {args.ttl:.0f}s, state in {args.state})...{COLOR_RESET}")
+            try:
+                live_count, all_results = rescan(
+                    network, state, args.discovery, args.discovery_ports, args.ports, args.concurrency,
+                    args.host_rate, args.timeout, timeouts, sink, print_progress)
+            finally:
+                state.close()
+            print(f"\n{COLOR_GREEN}Found {live_count} live hosts{COLOR_RESET}")
+            if state.changes:
+                print(f"{COLOR_YELLOW}Changes since the last scan:{COLOR_RESET}")
+                for change in state.changes:
+                    print(f"  {change}")
+        elif args.shards > 0:
+            # Discovery and scanning pipelined per host, results merged in this process
+            from shard_scanner import run_sharded_scan
+            print(f"{COLOR_YELLOW}Sweeping {count_hosts(network)} addresses in {args.shards} shards...{COLOR_RESET}")
+            live_count, all_results = run_sharded_scan(network, args.shards, args.discovery, args.discovery_ports, args.ports,
+                                                       concurrency=args.concurrency, host_rate=args.host_rate,
+                                                       timeout=args.timeout, adaptive_timeout=args.adaptive_timeout,
+                                                       randomize=args.randomize_ports, sink=sink)
+            print(f"\n{COLOR_GREEN}Found {live_count} live hosts{COLOR_RESET}")
+        else:
+            ip_list = [ip for ip in iter_hosts(network) if not sink.host_finished(ip)]
+            timeouts = None
+            if args.adaptive_timeout:
+                # One set of RTT estimates, so discovery's measurements carry over to the port scan
+                from async_scanner import AdaptiveTimeouts
+                timeouts = AdaptiveTimeouts(args.timeout)
+
+            # Host discovery
+            print(f"{COLOR_YELLOW}Discovering live hosts...{COLOR_RESET}")
+            live_ips = run_discovery(ip_list, args, timeouts) if ip_list else []
+            print(f"\n{COLOR_GREEN}Found {len(live_ips)} live hosts{COLOR_RESET}")
+            live_set = set(live_ips)
+            for ip in ip_list:
+                if ip not in live_set:
+                    sink.host_done(ip)
+
+            # Scan live hosts
+            all_results = run_port_scan(live_ips, args, timeouts, sink)
+        all_results = sink.previous_results + all_results
 
     # Generate and print report
     print(f"\n\n{COLOR_GREEN}Scan Results ({datetime.now().strftime('%Y-%m-%d %H:%M:%S')}):{COLOR_RESET}")
     if all_results:
         print(generate_report(all_results))
         print(summarize_results(all_results))
-        save_to_csv(all_results)
+        print(f"{COLOR_GREEN}Results saved to {args.output}{COLOR_RESET}")
     else:
         print(f"{COLOR_YELLOW}No open ports or vulnerabilities found.{COLOR_RESET}")
 
@@ -0,0 +1,177 @@
+import csv
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from network_scanner import CSV_HEADERS, RESULT_FIELDS
+
+FLUSH_EVERY = 100      # Buffered records before a write
+FLUSH_SECONDS = 2.0    # Longest time a record may sit in the buffer
+HOST_DONE = "*"        # Checkpoint port field marking every port of a host as done
+
+
+def read_jsonl_records(text: str) -> Tuple[List[Dict[str, str]], int]:
+    """Results from JSONL text and the offset just past the last complete line;
+    unparsable lines are skipped."""
+    results, end = [], 0
+    for line in text.split("\n")[:-1]:  # The piece after the last newline is unfinished
+        end += len(line) + 1
+        try:
+            results.append(json.loads(line))
+        except ValueError:
+            continue
+    return results, end
+
+
+def read_csv_records(text: str) -> Tuple[List[Dict[str, str]], int]:
+    """Results from CSV text (after its header) and the offset just past the last
+    complete row; a quoted field may span lines."""
+    lines = [line + "\n" for line in text.split("\n")[:-1]]
+    consumed = 0
+
+    def read_lines():
+        nonlocal consumed
+        for line in lines:
+            consumed += len(line)
+            yield line
+
+    results, end = [], 0
+    reader = csv.reader(read_lines(), strict=True)
+    try:
+        for number, row in enumerate(reader):
+            end = consumed
+            if number and len(row) == len(RESULT_FIELDS):  # Row 0 is the header
+                results.append(dict(zip(RESULT_FIELDS, row)))
+    except csv.Error:  # A quoted field left open at the end
+        pass
+    return results, end
+
+
+class Checkpoint:
+    """Completed work read from a checkpoint file: one "host port" line per
+    finished probe and "host *" once the whole host is finished."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.done_hosts: Set[str] = set()
+        self.done_ports: Dict[str, Set[int]] = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    ip, _, port = line.strip().partition(" ")
+                    if port == HOST_DONE:
+                        self.done_hosts.add(ip)
+                        self.done_ports.pop(ip, None)
+                    elif port.isdigit() and ip not in self.done_hosts:
+                        self.done_ports.setdefault(ip, set()).add(int(port))
+
+    def host_finished(self, ip: str) -> bool:
+        """True if a previous run completed every probe of this host."""
+        return ip in self.done_hosts
+
+    def pending_ports(self, ip: str, ports: List[int]) -> List[int]:
+        """The ports of a host that a previous run has not finished."""
+        if ip in self.done_hosts:
+            return []
+        done = self.done_ports.get(ip)
+        return [port for port in ports if port not in done] if done else ports
+
+
+class ResultSink(Checkpoint):
+    """Streams results to a JSONL (.jsonl) or CSV file as they are found and
+    records completed (host, port) work in a checkpoint file next to it.
+
+    Writes are buffered and flushed every FLUSH_EVERY records or FLUSH_SECONDS.
+    Results are always flushed before the checkpoint lines that cover them, so a
+    crash can only cause work to be redone, never lost. With `resume`, both files
+    are appended to and results of the earlier run are loaded into `previous_results`."""
+
+    def __init__(self, output: str, checkpoint: Optional[str] = None, resume: bool = False):
+        checkpoint = checkpoint or f"{output}.checkpoint"
+        if not resume and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        super().__init__(checkpoint)
+        self.jsonl = output.endswith(".jsonl")
+        self.previous_results = self.load_results(output) if resume else []
+        self.seen = {(r["IP"], r["Port"]) for r in self.previous_results}
+
+        new_file = not resume or not os.path.exists(output) or os.path.getsize(output) == 0
+        self.output = open(output, "w" if new_file else "a", newline="")
+        self.writer = None if self.jsonl else csv.writer(self.output)
+        if new_file and self.writer:
+            self.writer.writerow(CSV_HEADERS)
+        self.checkpoint = open(checkpoint, "a")
+
+        self.lock = threading.Lock()
+        self.pending_results: List[Dict[str, str]] = []
+        self.pending_marks: List[str] = []
+        self.last_flush = time.monotonic()
+
+    def load_results(self, output: str) -> List[Dict[str, str]]:
+        """Read back the results an interrupted run already wrote. A last record the
+        crash left unfinished is cut off, so appending starts on a new line; its probe
+        was not checkpointed yet and is simply redone."""
+        if not os.path.exists(output):
+            return []
+        with open(output, newline="") as f:
+            text = f.read()
+        results, end = read_jsonl_records(text) if self.jsonl else read_csv_records(text)
+        if end < len(text):
+            with open(output, "rb+") as f:
+                f.truncate(len(text[:end].encode()))
+        return results
+
+    def port_done(self, ip: str, port: int, result: Optional[Dict[str, str]] = None) -> None:
+        """Record one finished probe and its result row, if the port was open."""
+        with self.lock:
+            if result and (result["IP"], result["Port"]) not in self.seen:
+                self.seen.add((result["IP"], result["Port"]))
+                self.pending_results.append(result)
+            self.pending_marks.append(f"{ip} {port}\n")
+            self.maybe_flush()
+
+    def host_done(self, ip: str, results: Optional[List[Dict[str, str]]] = None) -> None:
+        """Record a host as finished, with any result rows not reported per port."""
+        with self.lock:
+            for result in results or []:
+                if (result["IP"], result["Port"]) not in self.seen:
+                    self.seen.add((result["IP"], result["Port"]))
+                    self.pending_results.append(result)
+            self.pending_marks.append(f"{ip} {HOST_DONE}\n")
+            self.maybe_flush()
+
+    def maybe_flush(self) -> None:
+        if (len(self.pending_results) + len(self.pending_marks) >= FLUSH_EVERY
+                or time.monotonic() - self.last_flush >= FLUSH_SECONDS):
+            self.flush_locked()
+
+    def flush(self) -> None:
+        with self.lock:
+            self.flush_locked()
+
+    def flush_locked(self) -> None:
+        if self.pending_results:
+            if self.writer:
+                self.writer.writerows([r[field] for field in RESULT_FIELDS] for r in self.pending_results)
+            else:
+                self.output.writelines(json.dumps(r) + "\n" for r in self.pending_results)
+            self.pending_results = []
+        self.output.flush()
+        if self.pending_marks:
+            self.checkpoint.writelines(self.pending_marks)
+            self.pending_marks = []
+        self.checkpoint.flush()
+        self.last_flush = time.monotonic()
+
+    def close(self) -> None:
+        self.flush()
+        self.output.close()
+        self.checkpoint.close()
+
+    def __enter__(self) -> "ResultSink":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,211 @@
+import asyncio
+import concurrent.futures
+import hashlib
+import ipaddress
+import sqlite3
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from network_scanner import (COMMON_PORTS, TIMEOUT, Network, count_hosts, get_service_name, host_bounds, is_host_alive,
+                             iter_hosts)
+from async_scanner import (CHECK_WORKERS, DEFAULT_CONCURRENCY, DEFAULT_HOST_RATE, DISCOVERY_PORTS, AdaptiveTimeouts,
+                           ScanLimits, for_each, host_workers, is_host_alive_async, scan_one_host)
+
+DEFAULT_TTL = 3600.0
+FINGERPRINT_PORTS = [21, 22, 23]  # Services with an expensive check and a banner sent before any request
+
+
+def fingerprint(banner: bytes) -> Optional[str]:
+    """Stable identifier of a service banner (None when the service sent nothing)."""
+    return hashlib.sha256(banner).hexdigest() if banner else None
+
+
+class ScanState:
+    """Persistent per-host and per-port scan state in SQLite: liveness, port state,
+    banner fingerprints and check results, each with the time it was last verified,
+    the time it last changed and whether it changed at that last verification."""
+
+    def __init__(self, path: str, ttl: float = DEFAULT_TTL):
+        self.ttl = ttl
+        self.started = time.time()
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS hosts (ip TEXT PRIMARY KEY, alive INTEGER NOT NULL, "
+                          "last_verified REAL NOT NULL, last_changed REAL NOT NULL, changed INTEGER NOT NULL)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS ports (ip TEXT NOT NULL, port INTEGER NOT NULL, "
+                          "state TEXT NOT NULL, fingerprint TEXT, severity TEXT, vulnerabilities TEXT, "
+                          "last_verified REAL NOT NULL, last_changed REAL NOT NULL, changed INTEGER NOT NULL, "
+                          "PRIMARY KEY (ip, port))")
+        self.conn.commit()
+        self.host_ports: Dict[str, Dict[int, tuple]] = {}
+        self.observed: Dict[Tuple[str, int], Optional[str]] = {}
+        self.changes: List[str] = []
+        self.skipped = 0  # Addresses prioritise_hosts passed over
+
+    def is_stale(self, last_verified: float, changed: int) -> bool:
+        """Due for verification: older than the TTL, or it changed when last verified."""
+        return bool(changed) or self.started - last_verified >= self.ttl
+
+    def prioritise_hosts(self, network: Network,
+                         finished: Optional[Callable[[str], bool]] = None) -> Iterator[Tuple[str, bool]]:
+        """Lazily yield the hosts of `network` to rescan as (ip, known alive). Stored hosts
+        come first: those that changed last time, then the longest unverified. Hosts
+        verified within the TTL keep their state; live ones are still listed so their
+        due ports get probed, but without discovery. Addresses never seen follow in range
+        order. Dead fresh hosts and `finished` ones are counted in `skipped`."""
+        first, last = host_bounds(network)
+        # SQLite sorts the rows before returning the first, so the rescan's own writes do not show up here
+        rows = self.conn.execute("SELECT ip, alive, changed OR last_verified <= ? AS due FROM hosts "
+                                 "ORDER BY changed DESC, due DESC, last_verified", (self.started - self.ttl,))
+        for ip, alive, due in rows:
+            address = ipaddress.ip_address(ip)
+            if address.version != network.version or not first <= int(address) <= last:
+                continue
+            if (finished and finished(ip)) or not (due or alive):
+                self.skipped += 1
+            else:
+                yield ip, not due
+        for ip in iter_hosts(network):
+            # Stored hosts were handled above; those first stored in this run were already yielded
+            if self.conn.execute("SELECT 1 FROM hosts WHERE ip = ?", (ip,)).fetchone():
+                continue
+            if finished and finished(ip):
+                self.skipped += 1
+            else:
+                yield ip, False
+
+    def load_host(self, ip: str) -> Dict[int, tuple]:
+        if ip not in self.host_ports:
+            self.host_ports[ip] = {row[0]: row[1:] for row in self.conn.execute(
+                "SELECT port, state, fingerprint, severity, vulnerabilities, last_verified, last_changed, changed "
+                "FROM ports WHERE ip = ?", (ip,))}
+        return self.host_ports[ip]
+
+    def due_ports(self, ip: str, ports: List[int]) -> List[int]:
+        """Ports of a host that changed or were not verified within the TTL, changed ones first."""
+        rows = self.load_host(ip)
+        due = [(0 if row[6] else 2, row[4], port) if row else (1, 0.0, port)
+               for port, row in ((port, rows.get(port)) for port in ports)
+               if row is None or self.is_stale(row[4], row[6])]
+        return [port for _, _, port in sorted(due)]
+
+    def result_row(self, ip: str, port: int, row: tuple) -> Dict[str, str]:
+        return {"IP": ip, "Port": str(port), "Service": get_service_name(port),
+                "Severity": row[2], "Vulnerabilities": row[3]}
+
+    def fresh_results(self, ip: str, ports: List[int]) -> List[Dict[str, str]]:
+        """Stored results of open ports that are still within the TTL (not rescanned)."""
+        rows = self.load_host(ip)
+        return [self.result_row(ip, port, rows[port]) for port in ports
+                if port in rows and rows[port][0] == "open" and not self.is_stale(rows[port][4], rows[port][6])]
+
+    def cached_result(self, ip: str, port: int, banner: bytes) -> Optional[Dict[str, str]]:
+        """Reuse the stored check result when the banner fingerprint is unchanged."""
+        observed = fingerprint(banner)
+        self.observed[(ip, port)] = observed
+        row = self.load_host(ip).get(port)
+        if observed and row and row[0] == "open" and row[1] == observed:
+            return self.result_row(ip, port, row)
+        return None
+
+    def port_done(self, ip: str, port: int, result: Optional[Dict[str, str]] = None) -> None:
+        """Record a verified port, noting a change of state, banner or check result."""
+        state = "open" if result else "closed"
+        new = (state, self.observed.pop((ip, port), None),
+               result["Severity"] if result else None, result["Vulnerabilities"] if result else None)
+        rows = self.load_host(ip)
+        old = rows.get(port)
+        # A first sighting is recorded but is not a change
+        changed = old is not None and old[:4] != new
+        if changed:
+            self.changes.append(f"{ip}:{port} {old[0]} -> {state}" + (f" ({new[3]})" if result else ""))
+        last_changed = old[5] if old is not None and not changed else self.started
+        rows[port] = new + (self.started, last_changed, int(changed))
+        self.conn.execute("INSERT OR REPLACE INTO ports VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", (ip, port) + rows[port])
+
+    def host_done(self, ip: str, alive: bool, verified: bool = True) -> None:
+        """Record a host and commit everything recorded for it. Liveness is only
+        updated when it was `verified` in this run (not assumed from a fresh record)."""
+        if not verified:
+            self.conn.commit()
+            self.host_ports.pop(ip, None)
+            return
+        row = self.conn.execute("SELECT alive, last_changed FROM hosts WHERE ip = ?", (ip,)).fetchone()
+        changed = row is not None and bool(row[0]) != alive
+        if changed:
+            self.changes.append(f"{ip} {'up' if alive else 'down'}")
+        last_changed = row[1] if row is not None and not changed else self.started
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO hosts VALUES (?, ?, ?, ?, ?)",
+                              (ip, int(alive), self.started, last_changed, int(changed)))
+        self.host_ports.pop(ip, None)
+
+    def close(self) -> None:
+        self.conn.commit()
+        self.conn.close()
+
+
+async def rescan_async(network: Network, state: ScanState, limits: ScanLimits, discovery: str = "tcp",
+                       discovery_ports: List[int] = DISCOVERY_PORTS, ports: List[int] = COMMON_PORTS,
+                       timeout: float = TIMEOUT, sink=None,
+                       on_progress: Optional[Callable[[int, int], None]] = None) -> Tuple[int, List[Dict[str, str]]]:
+    """Differential rescan: only hosts and ports that changed or are past the TTL are
+    probed, most urgent first, and checks are skipped for unchanged banners. Hosts the
+    sink finished in a previous run are skipped. Discovery runs as many hosts at once
+    as the global limit, port scans only host_workers of them. Returns (live host
+    count, results), where results include the still-fresh stored ones."""
+    loop = asyncio.get_running_loop()
+    scanning = asyncio.Semaphore(host_workers(limits, ports))
+    hosts = state.prioritise_hosts(network, sink.host_finished if sink else None)
+    total = count_hosts(network)
+    live, done, all_results = 0, 0, []
+
+    def port_done(ip: str, port: int, result: Optional[Dict[str, str]]) -> None:
+        state.port_done(ip, port, result)
+        if sink:
+            sink.port_done(ip, port, result)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=CHECK_WORKERS) as executor:
+        async def rescan_host(entry: Tuple[str, bool]) -> None:
+            nonlocal live, done
+            ip, known_alive = entry
+            alive = known_alive
+            if not alive:
+                if discovery == "tcp":
+                    alive = await is_host_alive_async(ip, limits, discovery_ports, timeout)
+                else:
+                    alive = await loop.run_in_executor(executor, is_host_alive, ip)
+            results = []
+            if alive:
+                live += 1
+                fresh = state.fresh_results(ip, ports)
+                due = state.due_ports(ip, ports)
+                if sink:
+                    due = sink.pending_ports(ip, due)
+                async with scanning:
+                    results = await scan_one_host(ip, limits, executor, due, timeout, False, port_done,
+                                                  state.cached_result, FINGERPRINT_PORTS) + fresh
+            all_results.extend(results)
+            state.host_done(ip, alive, verified=not known_alive)
+            if sink:
+                sink.host_done(ip, results)
+            limits.forget(ip)
+            done += 1
+            if on_progress:
+                on_progress(done + state.skipped, total)
+
+        await for_each(hosts, rescan_host, limits.concurrency)
+    if on_progress:
+        on_progress(done + state.skipped, total)
+    return live, all_results
+
+
+def rescan(network: Network, state: ScanState, discovery: str = "tcp", discovery_ports: List[int] = DISCOVERY_PORTS,
+           ports: List[int] = COMMON_PORTS, concurrency: int = DEFAULT_CONCURRENCY, host_rate: float = DEFAULT_HOST_RATE,
+           timeout: float = TIMEOUT, timeouts: Optional[AdaptiveTimeouts] = None, sink=None,
+           on_progress: Optional[Callable[[int, int], None]] = None) -> Tuple[int, List[Dict[str, str]]]:
+    """Run a differential rescan to completion from synchronous code."""
+    async def run() -> Tuple[int, List[Dict[str, str]]]:
+        limits = ScanLimits(concurrency, host_rate, timeouts)
+        return await rescan_async(network, state, limits, discovery, discovery_ports, ports, timeout, sink, on_progress)
+    return asyncio.run(run())
@@ -0,0 +1,103 @@
+import asyncio
+import multiprocessing
+import queue
+from typing import Dict, List, Optional, Tuple
+
+from network_scanner import COMMON_PORTS, TIMEOUT, Network, count_hosts, iter_hosts, print_progress
+from async_scanner import DEFAULT_CONCURRENCY, DEFAULT_HOST_RATE, DISCOVERY_PORTS, AdaptiveTimeouts, ScanLimits, sweep_async
+from result_sink import Checkpoint
+
+PROGRESS_EVERY = 256  # Hosts a shard probes between progress messages to the aggregator
+
+
+def scan_shard(shard: int, shards: int, network: Network, options: Dict, results_queue: multiprocessing.Queue) -> None:
+    """Worker process: sweep one interleaved slice of the range on its own event loop.
+
+    Sends (hosts skipped, finished hosts, live hosts, results) messages to the
+    aggregator and None when done. Hosts finished in a resumed run are skipped."""
+    checkpoint = Checkpoint(options["checkpoint"]) if options["checkpoint"] else None
+    skipped, finished = 0, []
+
+    def pending_hosts():
+        nonlocal skipped
+        for ip in iter_hosts(network, shard, shards):
+            if checkpoint and checkpoint.host_finished(ip):
+                skipped += 1
+            else:
+                yield ip
+
+    def host_done(ip: str, alive: bool, results: List[Dict[str, str]]) -> None:
+        nonlocal skipped, finished
+        if alive:
+            results_queue.put((0, [ip], 1, results))
+            return
+        finished.append(ip)
+        if skipped + len(finished) >= PROGRESS_EVERY:
+            results_queue.put((skipped, finished, 0, []))
+            skipped, finished = 0, []
+
+    async def run() -> None:
+        timeouts = AdaptiveTimeouts(options["timeout"]) if options["adaptive_timeout"] else None
+        limits = ScanLimits(options["concurrency"], options["host_rate"], timeouts)
+        await sweep_async(pending_hosts(), limits, options["discovery"], options["discovery_ports"],
+                          options["ports"], options["timeout"], options["randomize"], host_done, checkpoint)
+
+    try:
+        asyncio.run(run())
+    finally:
+        if skipped or finished:
+            results_queue.put((skipped, finished, 0, []))
+        results_queue.put(None)
+
+
+def run_sharded_scan(network: Network, shards: int, discovery: str = "tcp",
+                     discovery_ports: Optional[List[int]] = None, ports: Optional[List[int]] = None,
+                     concurrency: int = DEFAULT_CONCURRENCY, host_rate: float = DEFAULT_HOST_RATE,
+                     timeout: float = TIMEOUT, adaptive_timeout: bool = False,
+                     randomize: bool = False, sink=None) -> Tuple[int, List[Dict[str, str]]]:
+    """Split a range across worker processes and merge their results in this one.
+
+    The global concurrency is divided between the shards. Finished hosts and their
+    results are recorded in the optional result_sink.ResultSink, which only this
+    process writes to. Returns (live host count, results)."""
+    total = count_hosts(network)
+    shards = max(1, min(shards, total))
+    options = {
+        "discovery": discovery,
+        "discovery_ports": discovery_ports or DISCOVERY_PORTS,
+        "ports": ports or COMMON_PORTS,
+        "concurrency": max(1, concurrency // shards),
+        "host_rate": host_rate,
+        "timeout": timeout,
+        "adaptive_timeout": adaptive_timeout,
+        "randomize": randomize,
+        "checkpoint": sink.path if sink else None,
+    }
+    results_queue = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=scan_shard, args=(shard, shards, network, options, results_queue), daemon=True)
+               for shard in range(shards)]
+    for worker in workers:
+        worker.start()
+
+    probed, live, all_results, finished = 0, 0, [], 0
+    while finished < shards:
+        try:
+            message = results_queue.get(timeout=1.0)
+        except queue.Empty:
+            if not any(worker.is_alive() for worker in workers):
+                break  # A shard died without reporting back
+            continue
+        if message is None:
+            finished += 1
+            continue
+        skipped, hosts, alive, results = message
+        probed += skipped + len(hosts)
+        live += alive
+        all_results.extend(results)
+        if sink:
+            for ip in hosts:
+                sink.host_done(ip, results)
+        print_progress(probed, total)
+    for worker in workers:
+        worker.join()
+    return live, all_results
@@ -0,0 +1,162 @@
+# Vectorized batch mode: constraint propagation for many puzzles at once with NumPy
+import time
+import csv
+from collections import defaultdict
+from multiprocessing import Pool, cpu_count
+import numpy as np
+from colorama import Fore, Style
+from sudoku_solver import ENGINES, UNITS
+
+# Cell indices of the 27 units (9 rows, 9 columns, 9 boxes) and the 81x81 peer matrix
+UNIT_CELLS = np.array([[r * 9 + c for r, c in unit] for unit in UNITS], dtype=np.intp)
+PEER_MATRIX = np.zeros((81, 81), dtype=np.float32)
+for unit in UNIT_CELLS:
+    PEER_MATRIX[np.ix_(unit, unit)] = 1
+np.fill_diagonal(PEER_MATRIX, 0)
+DIGITS = np.arange(1, 10, dtype=np.uint8)
+
+# Propagation outcome per puzzle
+STATUS_STUCK, STATUS_SOLVED, STATUS_INVALID = 0, 1, 2
+
+# Load puzzles from CSV into an (N, 81) uint8 array plus their difficulty labels and the
+# number of rows skipped as malformed or not 9x9 ('0' or '.' for empty, as in parse_puzzle)
+def load_puzzle_array(filename):
+    strings, difficulties = [], []
+    skipped = 0
+    try:
+        with open(filename, 'r') as file:
+            reader = csv.reader(file)
+            next(reader, None)  # Skip header
+            for row in reader:
+                if not row:
+                    continue
+                puzzle = row[0].replace('.', '0')
+                if len(row) >= 2 and len(puzzle) == 81 and puzzle.isascii() and puzzle.isdigit():
+                    strings.append(puzzle)
+                    difficulties.append(row[1])
+                else:
+                    skipped += 1
+    except FileNotFoundError:
+        print(Fore.RED + f"Error: {filename} not found." + Style.RESET_ALL)
+    grids = np.frombuffer(''.join(strings).encode('ascii'), dtype=np.uint8).reshape(-1, 81) - ord('0')
+    return grids, difficulties, skipped
+
+# For every cell and digit, count the peers that already hold that digit
+def peer_counts(placed):
+    n = placed.shape[0]
+    flat = placed.transpose(1, 0, 2).reshape(81, n * 9).astype(np.float32)
+    return (PEER_MATRIX @ flat).reshape(81, n, 9).transpose(1, 0, 2)
+
+# Flag puzzles whose given clues already clash (same check as is_valid_board)
+def has_conflicts(grids):
+    placed = grids[:, :, None] == DIGITS
+    return (placed & (peer_counts(placed) > 0)).any(axis=(1, 2))
+
+# Apply naked and hidden singles to a batch of puzzles in place until no puzzle
+# makes progress; returns the propagation status of every puzzle
+def propagate_batch(grids):
+    status = np.full(len(grids), STATUS_STUCK, dtype=np.uint8)
+    active = np.arange(len(grids))
+    while active.size:
+        sub = grids[active]
+        placed = sub[:, :, None] == DIGITS
+        empty = sub == 0
+        blocked = peer_counts(placed) > 0
+        cand = np.where(empty[:, :, None], ~blocked, placed)
+        counts = cand.sum(axis=2)
+        unit_cand = cand[:, UNIT_CELLS]
+        unit_counts = unit_cand.sum(axis=2)
+        invalid = ((placed & blocked).any(axis=(1, 2)) |
+                   (empty & (counts == 0)).any(axis=1) |
+                   (unit_counts == 0).any(axis=(1, 2)))
+
+        # Naked singles, then hidden singles scattered back one unit group at a time
+        forced = cand & (empty & (counts == 1))[:, :, None]
+        hidden = unit_cand & (unit_counts == 1)[:, :, None, :]
+        for group in range(3):
+            units = slice(group * 9, group * 9 + 9)
+            forced[:, UNIT_CELLS[units].ravel()] |= hidden[:, units].reshape(len(active), 81, 9)
+        forced &= empty[:, :, None]
+        forced_counts = forced.sum(axis=2)
+        invalid |= (forced_counts > 1).any(axis=1)
+        assign = forced_counts == 1
+        sub[assign] = forced.argmax(axis=2)[assign] + 1
+        grids[active] = sub
+
+        progress = assign.any(axis=1) & ~invalid
+        status[active[invalid]] = STATUS_INVALID
+        solved = ~invalid & ~progress & ~(sub == 0).any(axis=1)
+        status[active[solved]] = STATUS_SOLVED
+        active = active[progress]
+    return status
+
+# Solve one puzzle left over after propagation (for multiprocessing)
+def solve_grid_task(args):
+    idx, grid, engine = args
+    board = [list(grid[i * 9:(i + 1) * 9]) for i in range(9)]
+    solved, solved_board = ENGINES[engine](board)
+    return idx, solved, bytes(x for row in solved_board for x in row)
+
+# Solve every puzzle in a CSV file: batched propagation, then search for the leftovers
+def run_batch(filename, engine, batch_size=10000, output_file='solve_results.csv'):
+    grids, difficulties, skipped = load_puzzle_array(filename)
+    if skipped:
+        print(Fore.RED + f"Skipped {skipped} rows that are malformed or not 9x9 puzzles; batch mode only supports 9x9 boards." + Style.RESET_ALL)
+    valid = np.ones(len(grids), dtype=bool)
+    for start in range(0, len(grids), batch_size):
+        valid[start:start + batch_size] = ~has_conflicts(grids[start:start + batch_size])
+    grids = grids[valid]
+    difficulties = [diff for diff, ok in zip(difficulties, valid) if ok]
+    total_puzzles = len(grids)
+    if not total_puzzles:
+        print(Fore.RED + "No valid puzzles loaded. Exiting." + Style.RESET_ALL)
+        return
+
+    print(Fore.YELLOW + f"Loaded {total_puzzles} puzzles. Batch propagation in chunks of {batch_size}, "
+          f"search with {cpu_count()} CPU cores ({engine} engine)..." + Style.RESET_ALL)
+    start_time = time.time()
+    status = np.empty(total_puzzles, dtype=np.uint8)
+    for start in range(0, total_puzzles, batch_size):
+        status[start:start + batch_size] = propagate_batch(grids[start:start + batch_size])
+    propagation_time = time.time() - start_time
+
+    # Only puzzles still unsolved after propagation reach the per-puzzle backtracker
+    stuck = np.flatnonzero(status == STATUS_STUCK)
+    searched = np.zeros(total_puzzles, dtype=bool)
+    if stuck.size:
+        tasks = ((idx, bytes(grids[idx]), engine) for idx in stuck)
+        with Pool(processes=cpu_count()) as pool:
+            for idx, solved, solution in pool.imap_unordered(solve_grid_task, tasks, chunksize=64):
+                searched[idx] = True
+                if solved:
+                    status[idx] = STATUS_SOLVED
+                    grids[idx] = np.frombuffer(solution, dtype=np.uint8)
+    elapsed = time.time() - start_time
+
+    solved_mask = status == STATUS_SOLVED
+    with open(output_file, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Puzzle ID', 'Difficulty', 'Solved', 'Method'])
+        writer.writerows(
+            (idx + 1, difficulties[idx], bool(solved_mask[idx]), 'search' if searched[idx] else 'propagation')
+            for idx in range(total_puzzles)
+        )
+
+    difficulty_stats = defaultdict(lambda: {'solved': 0, 'total': 0})
+    for diff, solved in zip(difficulties, solved_mask):
+        difficulty_stats[diff]['total'] += 1
+        difficulty_stats[diff]['solved'] += int(solved)
+    solved_count = int(solved_mask.sum())
+    by_propagation = int((solved_mask & ~searched).sum())
+
+    print(Fore.YELLOW + "\nBatch Summary:" + Style.RESET_ALL)
+    print(f"Total puzzles attempted: {total_puzzles}")
+    print(f"Total puzzles solved: {solved_count} ({by_propagation} by propagation alone, {solved_count - by_propagation} by search)")
+    print(f"Efficiency rate: {solved_count / total_puzzles * 100:.2f}%")
+    print(f"Propagation time: {propagation_time:.4f} seconds")
+    print(f"Total time taken: {elapsed:.4f} seconds")
+    print(f"Throughput: {total_puzzles / elapsed if elapsed > 0 else float('inf'):.1f} puzzles/second")
+
+    print(Fore.YELLOW + "\nDifficulty Breakdown:" + Style.RESET_ALL)
+    for diff, stats in difficulty_stats.items():
+        print(f"{diff}: {stats['solved']}/{stats['total']} solved ({stats['solved'] / stats['total'] * 100:.2f}%)")
@@ -0,0 +1,139 @@
+# Benchmark: compare solver engines across board sizes on generated puzzles,
+# or measure latency percentiles per engine on the bundled hardness tiers
+import os
+import time
+import math
+import random
+import argparse
+import statistics
+from multiprocessing import Pool, TimeoutError
+from colorama import init, Fore, Style
+from sudoku_solver import ENGINES, NINE_ONLY_ENGINES, COUNTER_NAMES, new_counters, is_valid_board, parse_puzzle
+
+# Initialize colorama for colored console output
+init()
+
+# Fraction of cells kept as clues per board size
+CLUE_RATIOS = {4: 0.35, 9: 0.3, 16: 0.4, 25: 0.55}
+
+# Bundled corpus: one puzzle per line in benchmarks/<tier>.txt, '#' starts a comment
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks')
+TIERS = ['easy', 'hard', 'hardest']
+
+# Random solved N x N grid: base pattern shuffled within bands and stacks, digits relabelled
+def generate_solution(size, rng):
+    box = math.isqrt(size)
+    rows = [band * box + r for band in rng.sample(range(box), box) for r in rng.sample(range(box), box)]
+    cols = [stack * box + c for stack in rng.sample(range(box), box) for c in rng.sample(range(box), box)]
+    digits = rng.sample(range(1, size + 1), size)
+    return [[digits[(box * (r % box) + r // box + c) % size] for c in cols] for r in rows]
+
+# Random puzzle: a solved grid with cells blanked independently
+def generate_puzzle(size, clue_ratio, rng):
+    return [[value if rng.random() < clue_ratio else 0 for value in row] for row in generate_solution(size, rng)]
+
+# Load the puzzles of one bundled hardness tier
+def load_tier(tier):
+    with open(os.path.join(CORPUS_DIR, f"{tier}.txt")) as f:
+        lines = [line.strip() for line in f]
+    return [parse_puzzle(line) for line in lines if line and not line.startswith('#')]
+
+# Nearest-rank percentile of an ascending list
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return float('nan')
+    return sorted_values[max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)]
+
+# Solve a single puzzle and time it (for multiprocessing); counters only when requested
+def timed_solve(args):
+    engine, puzzle, collect_stats = args
+    counters = new_counters() if collect_stats else None
+    start_time = time.perf_counter()
+    solved, board = ENGINES[engine](puzzle) if counters is None else ENGINES[engine](puzzle, counters)
+    solve_time = time.perf_counter() - start_time
+    solved = solved and is_valid_board(board) and all(all(row) for row in board)
+    return solved, solve_time, counters
+
+# Run one engine over a puzzle set in a worker process, abandoning puzzles that exceed the timeout
+def run_engine(engine, puzzles, timeout, collect_stats=False):
+    times, counters, solved_count, timeouts = [], [], 0, 0
+    pool = Pool(processes=1)
+    try:
+        for puzzle in puzzles:
+            try:
+                solved, solve_time, stats = pool.apply_async(timed_solve, ((engine, puzzle, collect_stats),)).get(timeout)
+            except TimeoutError:
+                timeouts += 1
+                pool.terminate()
+                pool = Pool(processes=1)
+                continue
+            solved_count += solved
+            times.append(solve_time)
+            if stats:
+                counters.append(stats)
+    finally:
+        pool.terminate()
+    return solved_count, timeouts, times, counters
+
+# Latency percentiles per engine on each bundled hardness tier
+def run_tiers(engines, tiers, timeout, collect_stats):
+    print(Fore.YELLOW + f"Benchmarking {', '.join(engines)} on tiers {', '.join(tiers)} "
+          f"(timeout {timeout:.0f}s)..." + Style.RESET_ALL)
+    header = f"{'Tier':>8} {'Engine':>8} {'Solved':>8} {'Timeouts':>9} {'p50 (ms)':>10} {'p95 (ms)':>10} {'p99 (ms)':>10} {'Max (ms)':>10}"
+    if collect_stats:
+        header += ''.join(f" {name.replace('_', ' ').title():>13}" for name in COUNTER_NAMES)
+    print(header)
+
+    for tier in tiers:
+        puzzles = load_tier(tier)
+        for engine in engines:
+            solved_count, timeouts, times, counters = run_engine(engine, puzzles, timeout, collect_stats)
+            times_ms = sorted(t * 1000 for t in times)
+            color = Fore.GREEN if solved_count == len(puzzles) else Fore.RED
+            line = (f"{tier:>8} {engine:>8} {color}{solved_count:>5}/{len(puzzles):<2}{Style.RESET_ALL} {timeouts:>9} "
+                    f"{percentile(times_ms, 50):>10.3f} {percentile(times_ms, 95):>10.3f} "
+                    f"{percentile(times_ms, 99):>10.3f} {times_ms[-1] if times_ms else float('nan'):>10.3f}")
+            if collect_stats:
+                # Mean per puzzle, except max depth which is the worst case
+                for name in COUNTER_NAMES:
+                    values = [c[name] for c in counters] or [0]
+                    line += f" {max(values) if name == 'max_depth' else statistics.mean(values):>13.1f}"
+            print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare Sudoku solver engines across board sizes or hardness tiers")
+    parser.add_argument('--engines', help="Comma-separated engines to compare (default: ac3,dlx for sizes, all engines for tiers)")
+    parser.add_argument('--tiers', nargs='?', const=','.join(TIERS), help=f"Run the bundled corpus tiers instead of sizes (default: {','.join(TIERS)})")
+    parser.add_argument('--stats', action='store_true', help="Also report search counters (tiers mode)")
+    parser.add_argument('--sizes', default='4,9,16,25', help="Comma-separated board sizes (perfect squares)")
+    parser.add_argument('--puzzles', type=int, default=10, help="Puzzles per board size")
+    parser.add_argument('--timeout', type=float, default=30.0, help="Per-puzzle timeout in seconds")
+    parser.add_argument('--seed', type=int, default=42, help="Random seed for puzzle generation")
+    args = parser.parse_args()
+
+    if args.tiers:
+        engines = [engine for engine in (args.engines or ','.join(ENGINES)).split(',') if engine in ENGINES]
+        run_tiers(engines, args.tiers.split(','), args.timeout, args.stats)
+        return
+
+    engines = [engine for engine in (args.engines or 'ac3,dlx').split(',') if engine in ENGINES]
+    rng = random.Random(args.seed)
+    print(Fore.YELLOW + f"Benchmarking {', '.join(engines)} on {args.puzzles} puzzles per size "
+          f"(timeout {args.timeout:.0f}s)..." + Style.RESET_ALL)
+    print(f"{'Size':>6} {'Engine':>8} {'Solved':>8} {'Timeouts':>9} {'Mean (s)':>10} {'Median (s)':>11} {'Max (s)':>9}")
+
+    for size in (int(s) for s in args.sizes.split(',')):
+        puzzles = [generate_puzzle(size, CLUE_RATIOS.get(size, 0.5), rng) for _ in range(args.puzzles)]
+        for engine in engines:
+            if engine in NINE_ONLY_ENGINES and size != 9:
+                continue
+            solved_count, timeouts, times, _ = run_engine(engine, puzzles, args.timeout)
+            mean = statistics.mean(times) if times else float('nan')
+            median = statistics.median(times) if times else float('nan')
+            worst = max(times) if times else float('nan')
+            color = Fore.GREEN if solved_count == len(puzzles) else Fore.RED
+            print(f"{size:>4}x{size:<2}{engine:>8} {color}{solved_count:>5}/{len(puzzles):<2}{Style.RESET_ALL} "
+                  f"{timeouts:>9} {mean:>10.4f} {median:>11.4f} {worst:>9.4f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+# Dancing Links (Knuth's Algorithm X) exact-cover engine for N x N Sudoku (N = 4, 9, 16, 25, ...)
+import math
+
+# Exact-cover matrix stored as parallel link arrays. Node 0 is the root and
+# nodes 1..num_columns are the column headers.
+class DancingLinks:
+    def __init__(self, num_columns):
+        nodes = num_columns + 1
+        self.left = [i - 1 for i in range(nodes)]
+        self.left[0] = num_columns
+        self.right = [i + 1 for i in range(nodes)]
+        self.right[num_columns] = 0
+        self.up = list(range(nodes))
+        self.down = list(range(nodes))
+        self.column = list(range(nodes))
+        self.row_id = [None] * nodes
+        self.size = [0] * nodes
+
+    # Append a row covering the given (1-based) columns
+    def add_row(self, row_id, columns):
+        first = None
+        for col in columns:
+            node = len(self.up)
+            self.column.append(col)
+            self.row_id.append(row_id)
+            self.up.append(self.up[col])
+            self.down.append(col)
+            self.down[self.up[col]] = node
+            self.up[col] = node
+            self.size[col] += 1
+            if first is None:
+                first = node
+                self.left.append(node)
+                self.right.append(node)
+            else:
+                self.left.append(self.left[first])
+                self.right.append(first)
+                self.right[self.left[first]] = node
+                self.left[first] = node
+
+    def cover(self, col):
+        left, right, up, down, column, size = self.left, self.right, self.up, self.down, self.column, self.size
+        right[left[col]] = right[col]
+        left[right[col]] = left[col]
+        i = down[col]
+        while i != col:
+            j = right[i]
+            while j != i:
+                down[up[j]] = down[j]
+                up[down[j]] = up[j]
+                size[column[j]] -= 1
+                j = right[j]
+            i = down[i]
+
+    def uncover(self, col):
+        left, right, up, down, column, size = self.left, self.right, self.up, self.down, self.column, self.size
+        i = up[col]
+        while i != col:
+            j = left[i]
+            while j != i:
+                size[column[j]] += 1
+                down[up[j]] = j
+                up[down[j]] = j
+                j = left[j]
+            i = up[i]
+        right[left[col]] = col
+        left[right[col]] = col
+
+    # Collect up to `limit` exact covers (lists of row ids) into `found`;
+    # returns True once the limit is reached. The matrix is fully restored.
+    # An optional stats dict receives search counters (see sudoku_solver.COUNTER_NAMES).
+    def search(self, limit, found, partial=None, stats=None):
+        partial = [] if partial is None else partial
+        right, left, down, column, size = self.right, self.left, self.down, self.column, self.size
+        if right[0] == 0:
+            found.append(list(partial))
+            return len(found) >= limit
+
+        # Branch on the column with the fewest remaining rows
+        col, best = 0, None
+        c = right[0]
+        while c != 0:
+            if best is None or size[c] < best:
+                col, best = c, size[c]
+                if best <= 1:
+                    break
+            c = right[c]
+        if best == 0:
+            return False
+
+        self.cover(col)
+        if stats is not None:
+            stats['max_depth'] = max(stats['max_depth'], len(partial) + 1)
+        r = down[col]
+        while r != col:
+            partial.append(self.row_id[r])
+            if stats is not None:
+                stats['nodes'] += 1
+            j = right[r]
+            while j != r:
+                if stats is not None:
+                    stats['propagations'] += size[column[j]]
+                self.cover(column[j])
+                j = right[j]
+            done = self.search(limit, found, partial, stats)
+            j = left[r]
+            while j != r:
+                self.uncover(column[j])
+                j = left[j]
+            partial.pop()
+            if done:
+                self.uncover(col)
+                return True
+            if stats is not None:
+                stats['backtracks'] += 1
+            r = down[r]
+        self.uncover(col)
+        return False
+
+# Build the exact-cover matrix for a board. Constraints already satisfied by
+# the givens are dropped, as are candidate rows that would clash with them.
+# Returns None if the givens contradict each other.
+def build_sudoku_matrix(board):
+    size = len(board)
+    box = math.isqrt(size)
+    cells = size * size
+
+    def constraints(r, c, d):
+        return (r * size + c,
+                cells + r * size + d,
+                2 * cells + c * size + d,
+                3 * cells + ((r // box) * box + c // box) * size + d)
+
+    satisfied = set()
+    for r in range(size):
+        for c in range(size):
+            if board[r][c]:
+                keys = constraints(r, c, board[r][c] - 1)
+                if satisfied.intersection(keys):
+                    return None
+                satisfied.update(keys)
+
+    open_columns = {key: idx + 1 for idx, key in enumerate(k for k in range(4 * cells) if k not in satisfied)}
+    matrix = DancingLinks(len(open_columns))
+    for r in range(size):
+        for c in range(size):
+            if board[r][c]:
+                continue
+            for d in range(size):
+                keys = constraints(r, c, d)
+                if not satisfied.intersection(keys):
+                    matrix.add_row((r, c, d + 1), [open_columns[k] for k in keys])
+    return matrix
+
+# Solve Sudoku of any N x N size via Dancing Links
+def solve_sudoku_dlx(board, stats=None):
+    matrix = build_sudoku_matrix(board)
+    if matrix is None:
+        return False, board
+    found = []
+    matrix.search(1, found, stats=stats)
+    if not found:
+        return False, board
+    for r, c, d in found[0]:
+        board[r][c] = d
+    return True, board
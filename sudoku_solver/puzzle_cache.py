@@ -0,0 +1,123 @@
+# Canonical-form solution cache for 9x9 Sudoku. Puzzles that differ only by
+# digit relabeling, row/column swaps within a band/stack, band/stack swaps or
+# transposition map to one canonical representative, solved at most once.
+import sqlite3
+from itertools import permutations, product
+import numpy as np
+
+# All 1296 line orders that keep the box structure: block order x order within each block
+TRIPLES = list(permutations(range(3)))
+LINE_ORDERS = np.array([[3 * blocks[i] + within[i][k] for i in range(3) for k in range(3)]
+                        for blocks in TRIPLES for within in product(TRIPLES, repeat=3)], dtype=np.intp)
+
+# ORDER_WEIGHTS[c, o] is the bit weight source column c gets under column order o;
+# output column 0 is the most significant bit, so smaller values have later clues
+ORDER_WEIGHTS = np.zeros((9, len(LINE_ORDERS)), dtype=np.int64)
+ORDER_WEIGHTS[LINE_ORDERS, np.arange(len(LINE_ORDERS))[:, None]] = 1 << np.arange(8, -1, -1)
+
+# Clue-mask value of every row under every column order, shape (9, 1296)
+def line_values(grid):
+    return (grid != 0).astype(np.int64) @ ORDER_WEIGHTS
+
+# Rows that may be placed next: any row of an unused band at a band start,
+# otherwise an unused row of the current band
+def next_rows(rows):
+    if len(rows) % 3 == 0:
+        used_bands = {r // 3 for r in rows}
+        return [r for r in range(9) if r // 3 not in used_bands]
+    band = rows[-1] // 3
+    return [r for r in range(band * 3, band * 3 + 3) if r not in rows]
+
+# Find the canonical form of a puzzle: the smallest clue mask over all
+# transforms, ties broken by the smallest digit string after relabeling digits
+# in order of first appearance. Returns (canonical 81-char string, transform).
+def canonical_transform(board):
+    grid = np.array(board, dtype=np.uint8)
+    grids = (grid, grid.T)
+    values = [line_values(g) for g in grids]
+
+    # Fix rows one at a time, keeping only the column orders that tie on the smallest mask
+    states = [(t, (), np.arange(len(LINE_ORDERS))) for t in (0, 1)]
+    for _ in range(9):
+        best, expanded = None, []
+        for t, rows, orders in states:
+            for r in next_rows(rows):
+                row_values = values[t][r, orders]
+                low = row_values.min()
+                if best is None or low < best:
+                    best, expanded = low, []
+                if low == best:
+                    expanded.append((t, rows + (r,), orders[row_values == low]))
+        states = expanded
+
+    best_key, best_transform = None, None
+    for t, rows, orders in states:
+        for order in orders:
+            cols = tuple(LINE_ORDERS[order].tolist())
+            cells = grids[t][np.ix_(rows, cols)].ravel().tolist()
+            relabel = {}
+            key = tuple(relabel.setdefault(v, len(relabel) + 1) if v else 0 for v in cells)
+            if best_key is None or key < best_key:
+                best_key, best_transform = key, (t, rows, cols, relabel)
+    return ''.join(map(str, best_key)), best_transform
+
+# Complete a partial relabeling so digits missing from the clues map in sorted order
+def full_relabel(relabel):
+    missing_src = [d for d in range(1, 10) if d not in relabel]
+    missing_dst = [d for d in range(1, 10) if d not in relabel.values()]
+    return {**relabel, **dict(zip(missing_src, missing_dst))}
+
+# Map a solved board into the canonical frame of a transform
+def to_canonical(board, transform):
+    t, rows, cols, relabel = transform
+    grid = [list(row) for row in zip(*board)] if t else board
+    mapping = full_relabel(relabel)
+    return ''.join(str(mapping[grid[r][c]]) for r in rows for c in cols)
+
+# Map a canonical solution back onto the original puzzle's frame
+def from_canonical(solution, transform):
+    t, rows, cols, relabel = transform
+    inverse = {dst: src for src, dst in full_relabel(relabel).items()}
+    grid = [[0] * 9 for _ in range(9)]
+    for i, r in enumerate(rows):
+        for j, c in enumerate(cols):
+            grid[r][c] = inverse[int(solution[i * 9 + j])]
+    return [list(row) for row in zip(*grid)] if t else grid
+
+# Persistent on-disk store of solved canonical grids (an empty solution marks an unsolvable puzzle)
+class SolutionCache:
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS solutions (canonical TEXT PRIMARY KEY, solution TEXT NOT NULL)")
+        self.conn.commit()
+
+    def get(self, canonical):
+        row = self.conn.execute("SELECT solution FROM solutions WHERE canonical = ?", (canonical,)).fetchone()
+        return row[0] if row else None
+
+    def put(self, canonical, solution):
+        with self.conn:
+            self.conn.execute("INSERT OR IGNORE INTO solutions (canonical, solution) VALUES (?, ?)", (canonical, solution))
+
+# One open cache per path and process (worker processes open their own connection)
+_open_caches = {}
+
+def get_cache(path):
+    if path not in _open_caches:
+        _open_caches[path] = SolutionCache(path)
+    return _open_caches[path]
+
+# Answer a puzzle from the cache when an equivalent one was solved before,
+# otherwise solve it and store the solution in canonical form.
+# Returns (solved, board, cache_hit).
+def solve_with_cache(board, solver, cache):
+    canonical, transform = canonical_transform(board)
+    cached = cache.get(canonical)
+    if cached is not None:
+        if not cached:
+            return False, board, True
+        return True, from_canonical(cached, transform), True
+    solved, solved_board = solver(board)
+    cache.put(canonical, to_canonical(solved_board, transform) if solved else '')
+    return solved, solved_board, False
@@ -2,79 +2,132 @@
 import time
 import csv
 import copy
-from collections import defaultdict
+from collections import defaultdict, deque
 import statistics
 from multiprocessing import Pool, cpu_count
 from colorama import init, Fore, Style
 import os
+import argparse
+import math
+from functools import lru_cache
+from dlx_solver import solve_sudoku_dlx, build_sudoku_matrix
+from puzzle_cache import get_cache, solve_with_cache
 
 # Initialize colorama for colored console output
 init()
 
+# Bitmask tables: digit d is stored as bit (d - 1) of a 9-bit candidate mask
+ALL_DIGITS = 0x1FF
+ROW_OF = [idx // 9 for idx in range(81)]
+COL_OF = [idx % 9 for idx in range(81)]
+BOX_OF = [(idx // 27) * 3 + (idx % 9) // 3 for idx in range(81)]
+BIT_COUNT = [bin(mask).count('1') for mask in range(ALL_DIGITS + 1)]
+DIGIT_OF_BIT = {1 << (d - 1): d for d in range(1, 10)}
+
+# Cell symbols for boards up to 25x25 ('0' or '.' marks an empty cell)
+SYMBOLS = "123456789ABCDEFGHIJKLMNOP"
+
+# Static peer tables for an N x N board: the units (rows, columns, boxes),
+# the 3 units of every cell and its peers (20 per cell on a 9x9 board)
+@lru_cache(maxsize=None)
+def unit_tables(size):
+    box = math.isqrt(size)
+    units = ([[(r, c) for c in range(size)] for r in range(size)] +
+             [[(r, c) for r in range(size)] for c in range(size)] +
+             [[(r, c) for r in range(br, br + box) for c in range(bc, bc + box)]
+              for br in range(0, size, box) for bc in range(0, size, box)])
+    units_of = [[[] for _ in range(size)] for _ in range(size)]
+    for unit in units:
+        for r, c in unit:
+            units_of[r][c].append(unit)
+    peers = [[sorted({cell for unit in units_of[r][c] for cell in unit} - {(r, c)}) for c in range(size)] for r in range(size)]
+    return units, units_of, peers
+
+UNITS, UNITS_OF, PEERS = unit_tables(9)
+
 # Print Sudoku board with colorized formatting
 def print_board(board, highlight=None):
     highlight = highlight or set()
-    for i in range(9):
-        if i % 3 == 0 and i != 0:
-            print(Fore.CYAN + "- - - - - - - - - - - -" + Style.RESET_ALL)
-        for j in range(9):
-            if j % 3 == 0 and j != 0:
+    size = len(board)
+    box = math.isqrt(size)
+    for i in range(size):
+        if i % box == 0 and i != 0:
+            print(Fore.CYAN + "- " * (size + box - 1) + "-" + Style.RESET_ALL)
+        for j in range(size):
+            if j % box == 0 and j != 0:
                 print(Fore.CYAN + "|" + Style.RESET_ALL, end=" ")
             cell = board[i][j]
             if (i, j) in highlight:
-                print(Fore.GREEN + f"{cell if cell != 0 else '.'}" + Style.RESET_ALL, end=" ")
+                print(Fore.GREEN + f"{SYMBOLS[cell - 1] if cell != 0 else '.'}" + Style.RESET_ALL, end=" ")
             else:
-                print(Fore.WHITE + f"{cell if cell != 0 else '.'}" + Style.RESET_ALL, end=" ")
+                print(Fore.WHITE + f"{SYMBOLS[cell - 1] if cell != 0 else '.'}" + Style.RESET_ALL, end=" ")
         print()
     print()
 
 # Validate number placement
 def is_valid(board, row, col, num):
-    for x in range(9):
+    size = len(board)
+    box = math.isqrt(size)
+    for x in range(size):
         if board[row][x] == num or board[x][col] == num:
             return False
-    start_row, start_col = 3 * (row // 3), 3 * (col // 3)
-    for i in range(start_row, start_row + 3):
-        for j in range(start_col, start_col + 3):
+    start_row, start_col = box * (row // box), box * (col // box)
+    for i in range(start_row, start_row + box):
+        for j in range(start_col, start_col + box):
             if board[i][j] == num:
                 return False
     return True
 
-# Constraint propagation with AC-3
-def ac3(board, domains):
-    arcs = [(r, c) for r in range(9) for c in range(9) if board[r][c] == 0]
-    queue = [(r1, c1, r2, c2) for r1 in range(9) for c1 in range(9) if board[r1][c1] == 0
-             for r2 in range(9) for c2 in range(9) if board[r2][c2] == 0 and (r1, c1) != (r2, c2)
-             and (r1 == r2 or c1 == c2 or (r1//3 == r2//3 and c1//3 == c2//3))]
-    
-    while queue:
-        (r1, c1, r2, c2) = queue.pop(0)
-        if revise(board, domains, r1, c1, r2, c2):
-            if not domains[r1][c1]:
-                return False
-            # Add neighboring arcs
-            for r3 in range(9):
-                for c3 in range(9):
-                    if (r3, c3) != (r1, c1) and (r3 == r1 or c3 == c1 or (r3//3 == r1//3 and c3//3 == c1//3)):
-                        queue.append((r3, c3, r1, c1))
-    return True
+# Constraint propagation driven by the static peer table. Only cells whose
+# domains changed are queued: singletons are eliminated from their peers and
+# every removal re-checks the removed digit for hidden singles in its units.
+def ac3(board, domains, changed=None, trail=None, stats=None):
+    size = len(domains)
+    _, units_of, peers = unit_tables(size)
+    if changed is None:
+        changed = [(r, c) for r in range(size) for c in range(size) if len(domains[r][c]) == 1]
+    singles = deque(changed)
+    removals = deque()
 
-def revise(board, domains, r1, c1, r2, c2):
-    revised = False
-    if (r1 == r2 or c1 == c2 or (r1//3 == r2//3 and c1//3 == c2//3)):
-        values = domains[r1][c1].copy()
-        for x in values:
-            if not any(is_valid(board, r2, c2, y) and y != x for y in domains[r2][c2]):
-                domains[r1][c1].remove(x)
-                revised = True
-    return revised
+    def remove(r, c, value):
+        domain = domains[r][c]
+        domain.discard(value)
+        if trail is not None:
+            trail.append((r, c, value))
+        if stats is not None:
+            stats['propagations'] += 1
+        removals.append((r, c, value))
+        if len(domain) == 1:
+            singles.append((r, c))
+        return bool(domain)
+
+    while singles or removals:
+        if singles:
+            r, c = singles.popleft()
+            if len(domains[r][c]) != 1:
+                continue
+            value = next(iter(domains[r][c]))
+            for pr, pc in peers[r][c]:
+                if value in domains[pr][pc] and not remove(pr, pc, value):
+                    return False
+        else:
+            r, c, value = removals.popleft()
+            for unit in units_of[r][c]:
+                places = [(ur, uc) for ur, uc in unit if value in domains[ur][uc]]
+                if not places:
+                    return False
+                if len(places) == 1:
+                    hr, hc = places[0]
+                    for other in [v for v in domains[hr][hc] if v != value]:
+                        remove(hr, hc, other)
+    return True
 
 # Find cell with Minimum Remaining Values (MRV)
 def find_empty_mrv(board, domains):
-    min_values = 10
+    min_values = len(board) + 1
     best_cell = None
-    for i in range(9):
-        for j in range(9):
+    for i in range(len(board)):
+        for j in range(len(board)):
             if board[i][j] == 0:
                 values = len(domains[i][j])
                 if values < min_values:
@@ -82,74 +135,212 @@ def find_empty_mrv(board, domains):
                     best_cell = (i, j)
     return best_cell
 
+# Search counters collected by the engines when a stats dict is passed in
+COUNTER_NAMES = ('nodes', 'backtracks', 'propagations', 'max_depth')
+COUNTER_COLUMNS = ['Nodes', 'Backtracks', 'Propagations', 'Max Depth']
+
+def new_counters():
+    return dict.fromkeys(COUNTER_NAMES, 0)
+
 # Solve Sudoku using backtracking with constraint propagation
-def solve_sudoku(board):
+def solve_sudoku(board, stats=None):
     # Initialize domains
-    domains = [[{1,2,3,4,5,6,7,8,9} if board[i][j] == 0 else {board[i][j]} for j in range(9)] for i in range(9)]
+    size = len(board)
+    domains = [[set(range(1, size + 1)) if board[i][j] == 0 else {board[i][j]} for j in range(size)] for i in range(size)]
     
     # Apply AC-3 initially
-    if not ac3(board, domains):
+    if not ac3(board, domains, stats=stats):
         return False, board
     
     # If all cells have single values, assign them
-    for i in range(9):
-        for j in range(9):
+    for i in range(size):
+        for j in range(size):
             if board[i][j] == 0 and len(domains[i][j]) == 1:
-                board[i][j] = domains[i][j].pop()
+                board[i][j] = next(iter(domains[i][j]))
     
-    # Backtracking with MRV
-    def backtrack(board, domains):
+    # Backtracking with MRV; domain removals are undone from a trail
+    trail = []
+
+    def backtrack(board, domains, depth=0):
         empty = find_empty_mrv(board, domains)
         if not empty:
             return True
         row, col = empty
+        if stats is not None:
+            stats['max_depth'] = max(stats['max_depth'], depth + 1)
         
         for num in domains[row][col].copy():
             if is_valid(board, row, col, num):
+                if stats is not None:
+                    stats['nodes'] += 1
                 board[row][col] = num
-                old_domains = copy.deepcopy(domains)
-                domains[row][col] = {num}
-                if ac3(board, domains) and backtrack(board, domains):
+                mark = len(trail)
+                for other in domains[row][col] - {num}:
+                    domains[row][col].discard(other)
+                    trail.append((row, col, other))
+                if ac3(board, domains, [(row, col)], trail, stats) and backtrack(board, domains, depth + 1):
                     return True
+                if stats is not None:
+                    stats['backtracks'] += 1
                 board[row][col] = 0
-                domains = old_domains
+                while len(trail) > mark:
+                    r, c, value = trail.pop()
+                    domains[r][c].add(value)
         return False
     
     solved = backtrack(board, domains)
     return solved, board
 
-# Parse puzzle from string or 2D list
+# Search with 9-bit candidate masks and an undo trail (no deep copies) for up to `limit` solutions.
+# Returns (number of solutions found, first solution as 81 cells or None).
+def bitmask_search(board, limit=1, stats=None):
+    if len(board) != 9:
+        raise ValueError("The bitmask engine only supports 9x9 boards")
+    cells = [board[r][c] for r in range(9) for c in range(9)]
+    row_used, col_used, box_used = [0] * 9, [0] * 9, [0] * 9
+    for idx, num in enumerate(cells):
+        if num:
+            bit = 1 << (num - 1)
+            r, c, b = ROW_OF[idx], COL_OF[idx], BOX_OF[idx]
+            if (row_used[r] | col_used[c] | box_used[b]) & bit:
+                return 0, None
+            row_used[r] |= bit
+            col_used[c] |= bit
+            box_used[b] |= bit
+    empty = [idx for idx in range(81) if cells[idx] == 0]
+    trail = []
+    solutions = []
+
+    def place(idx, bit):
+        row_used[ROW_OF[idx]] |= bit
+        col_used[COL_OF[idx]] |= bit
+        box_used[BOX_OF[idx]] |= bit
+        cells[idx] = DIGIT_OF_BIT[bit]
+        trail.append((idx, bit))
+
+    def undo(mark):
+        while len(trail) > mark:
+            idx, bit = trail.pop()
+            row_used[ROW_OF[idx]] ^= bit
+            col_used[COL_OF[idx]] ^= bit
+            box_used[BOX_OF[idx]] ^= bit
+            cells[idx] = 0
+
+    # Fill naked singles, then branch on the MRV cell; the caller undoes on failure
+    def backtrack(depth=0):
+        while True:
+            best, best_count, best_cand, forced = None, 10, 0, False
+            for idx in empty:
+                if cells[idx]:
+                    continue
+                cand = ALL_DIGITS & ~(row_used[ROW_OF[idx]] | col_used[COL_OF[idx]] | box_used[BOX_OF[idx]])
+                if not cand:
+                    return False
+                count = BIT_COUNT[cand]
+                if count == 1:
+                    place(idx, cand)
+                    forced = True
+                    if stats is not None:
+                        stats['propagations'] += 1
+                elif count < best_count:
+                    best, best_count, best_cand = idx, count, cand
+            if not forced:
+                break
+        if best is None:
+            solutions.append(cells[:] if not solutions else None)
+            return len(solutions) >= limit
+        if stats is not None:
+            stats['max_depth'] = max(stats['max_depth'], depth + 1)
+        mark = len(trail)
+        while best_cand:
+            bit = best_cand & -best_cand
+            best_cand ^= bit
+            place(best, bit)
+            if stats is not None:
+                stats['nodes'] += 1
+            if backtrack(depth + 1):
+                return True
+            if stats is not None:
+                stats['backtracks'] += 1
+            undo(mark)
+        return False
+
+    backtrack()
+    return len(solutions), solutions[0] if solutions else None
+
+# Solve Sudoku with 9-bit candidate masks and an undo trail (no deep copies)
+def solve_sudoku_bitmask(board, stats=None):
+    count, solution = bitmask_search(board, 1, stats)
+    if count:
+        for idx, value in enumerate(solution):
+            board[ROW_OF[idx]][COL_OF[idx]] = value
+    return count > 0, board
+
+# Count solutions, stopping as soon as `limit` are found (limit=2 is a uniqueness check)
+def count_solutions(board, limit=2):
+    if len(board) == 9:
+        return bitmask_search(board, limit)[0]
+    matrix = build_sudoku_matrix(board)
+    if matrix is None:
+        return 0
+    found = []
+    matrix.search(limit, found)
+    return len(found)
+
+# Available solver engines, selectable from the command line
+ENGINES = {
+    'ac3': solve_sudoku,
+    'bitmask': solve_sudoku_bitmask,
+    'dlx': solve_sudoku_dlx,
+}
+NINE_ONLY_ENGINES = {'bitmask'}
+
+# Board side length for a given number of cells (81 -> 9, 256 -> 16, 625 -> 25), or None
+def board_size(cell_count):
+    size = math.isqrt(cell_count)
+    box = math.isqrt(size)
+    if size < 4 or size * size != cell_count or box * box != size or size > len(SYMBOLS):
+        return None
+    return size
+
+# Parse puzzle from string (N*N symbols, '0' or '.' for empty) or 2D list
 def parse_puzzle(puzzle_input):
     if isinstance(puzzle_input, str):
-        if len(puzzle_input) != 81:
-            return None
-        try:
-            return [[int(puzzle_input[i * 9 + j]) for j in range(9)] for i in range(9)]
-        except ValueError:
+        size = board_size(len(puzzle_input))
+        if size is None:
             return None
-    elif isinstance(puzzle_input, list) and len(puzzle_input) == 9 and all(len(row) == 9 for row in puzzle_input):
-        return [[x if isinstance(x, int) and 0 <= x <= 9 else 0 for x in row] for row in puzzle_input]
+        values = []
+        for ch in puzzle_input.upper():
+            value = 0 if ch in '0.' else SYMBOLS.find(ch) + 1
+            if not 0 <= value <= size or (value == 0 and ch not in '0.'):
+                return None
+            values.append(value)
+        return [values[i * size:(i + 1) * size] for i in range(size)]
+    elif isinstance(puzzle_input, list) and board_size(len(puzzle_input) ** 2) and all(len(row) == len(puzzle_input) for row in puzzle_input):
+        size = len(puzzle_input)
+        return [[x if isinstance(x, int) and 0 <= x <= size else 0 for x in row] for row in puzzle_input]
     return None
 
 # Validate input board
 def is_valid_board(board):
-    if not board or len(board) != 9 or any(len(row) != 9 for row in board):
+    if not board or not board_size(len(board) ** 2) or any(len(row) != len(board) for row in board):
         return False
-    for i in range(9):
-        row_nums = [board[i][j] for j in range(9) if board[i][j] != 0]
-        col_nums = [board[j][i] for j in range(9) if board[j][i] != 0]
+    size = len(board)
+    box = math.isqrt(size)
+    for i in range(size):
+        row_nums = [board[i][j] for j in range(size) if board[i][j] != 0]
+        col_nums = [board[j][i] for j in range(size) if board[j][i] != 0]
         if len(row_nums) != len(set(row_nums)) or len(col_nums) != len(set(col_nums)):
             return False
-    for box_row in range(0, 9, 3):
-        for box_col in range(0, 9, 3):
-            box_nums = [board[i][j] for i in range(box_row, box_row + 3) for j in range(box_col, box_col + 3) if board[i][j] != 0]
+    for box_row in range(0, size, box):
+        for box_col in range(0, size, box):
+            box_nums = [board[i][j] for i in range(box_row, box_row + box) for j in range(box_col, box_col + box) if board[i][j] != 0]
             if len(box_nums) != len(set(box_nums)):
                 return False
     return True
 
-# Load puzzles from CSV file
-def load_puzzles(filename):
-    puzzles = []
+# Lazily yield valid puzzles from CSV file, one row at a time
+def iter_puzzles(filename):
     try:
         with open(filename, 'r') as file:
             reader = csv.reader(file)
@@ -158,36 +349,195 @@ def load_puzzles(filename):
                 if len(row) >= 2:  # Expect puzzle string and difficulty
                     puzzle = parse_puzzle(row[0])
                     if puzzle and is_valid_board(puzzle):
-                        puzzles.append((puzzle, row[1] if len(row) > 1 else 'Unknown'))
+                        yield puzzle, row[1] if len(row) > 1 else 'Unknown'
     except FileNotFoundError:
         print(Fore.RED + f"Error: {filename} not found." + Style.RESET_ALL)
-    return puzzles
+
+# Load puzzles from CSV file
+def load_puzzles(filename):
+    return list(iter_puzzles(filename))
 
 # Solve a single puzzle (for multiprocessing)
 def solve_puzzle_task(args):
-    idx, puzzle, difficulty = args
+    idx, puzzle, difficulty, engine, cache_path, collect_stats = args
     board = copy.deepcopy(puzzle)
+    counters = new_counters() if collect_stats else None
+    solver = ENGINES[engine] if counters is None else lambda b: ENGINES[engine](b, counters)
+    start_time = time.perf_counter()
+    if cache_path and len(board) == 9:
+        solved, solved_board, cache_hit = solve_with_cache(board, solver, get_cache(cache_path))
+    else:
+        (solved, solved_board), cache_hit = solver(board), False
+    solve_time = time.perf_counter() - start_time
+    stats = {'cache_hit': cache_hit, **(counters or {})}
+    return idx, puzzle, solved_board, solved, solve_time, difficulty, stats
+
+# Count solutions of a single puzzle, stopping at the second one (for multiprocessing)
+def count_puzzle_task(args):
+    idx, puzzle, difficulty = args
+    start_time = time.perf_counter()
+    count = count_solutions(puzzle, 2)
+    return idx, difficulty, count, time.perf_counter() - start_time
+
+# Uniqueness check over a CSV of puzzles: no solution, unique, or multiple solutions
+def run_uniqueness_check(filename, chunksize=32, output_file='solve_results.csv'):
+    labels = {0: 'None', 1: 'Unique', 2: 'Multiple'}
+    tasks = ((i + 1, puzzle, diff) for i, (puzzle, diff) in enumerate(iter_puzzles(filename)))
+    totals = defaultdict(int)
     start_time = time.time()
-    solved, solved_board = solve_sudoku(board)
-    solve_time = time.time() - start_time
-    return idx, puzzle, solved_board, solved, solve_time, difficulty
+    with open(output_file, 'w', newline='') as f, Pool(processes=cpu_count()) as pool:
+        writer = csv.writer(f)
+        writer.writerow(['Puzzle ID', 'Difficulty', 'Solutions', 'Time (s)'])
+        for idx, difficulty, count, check_time in pool.imap_unordered(count_puzzle_task, tasks, chunksize=chunksize):
+            writer.writerow([idx, difficulty, labels[count], f"{check_time:.4f}"])
+            totals[labels[count]] += 1
+    elapsed = time.time() - start_time
+
+    total_puzzles = sum(totals.values())
+    if not total_puzzles:
+        print(Fore.RED + "No valid puzzles loaded. Exiting." + Style.RESET_ALL)
+        return
+    print(Fore.YELLOW + "\nUniqueness Summary:" + Style.RESET_ALL)
+    print(f"Total puzzles checked: {total_puzzles}")
+    print(Fore.GREEN + f"Unique solution: {totals['Unique']}" + Style.RESET_ALL)
+    print(Fore.RED + f"Multiple solutions: {totals['Multiple']}" + Style.RESET_ALL)
+    print(Fore.RED + f"No solution: {totals['None']}" + Style.RESET_ALL)
+    print(f"Throughput: {total_puzzles / elapsed if elapsed > 0 else float('inf'):.1f} puzzles/second")
+
+# Print initial and solved boards with the per-puzzle status line
+def print_puzzle_result(idx, original, solved_board, solved, solve_time, difficulty):
+    print(Fore.YELLOW + f"\nPuzzle {idx} (Difficulty: {difficulty}):" + Style.RESET_ALL)
+    print("Initial board:")
+    print_board(original)
+    print("Solved board:" if solved else "No solution found:")
+    highlight = {(i, j) for i in range(len(original)) for j in range(len(original)) if original[i][j] == 0}
+    print_board(solved_board, highlight)
+    status = Fore.GREEN + "Solved" if solved else Fore.RED + "Failed"
+    print(f"Status: {status}" + Style.RESET_ALL + f" | Time: {solve_time:.4f} seconds")
+
+# Log-scale histogram of solve times: bounded-memory approximate median for streaming
+HIST_BUCKETS_PER_DECADE = 20
+HIST_MIN_EXPONENT = -7
+
+def histogram_bucket(solve_time):
+    return max(0, int((math.log10(max(solve_time, 10 ** HIST_MIN_EXPONENT)) - HIST_MIN_EXPONENT) * HIST_BUCKETS_PER_DECADE))
+
+def histogram_median(histogram, total):
+    seen = 0
+    for bucket in sorted(histogram):
+        seen += histogram[bucket]
+        if seen * 2 >= total:
+            return 10 ** ((bucket + 0.5) / HIST_BUCKETS_PER_DECADE + HIST_MIN_EXPONENT)
+    return 0
+
+# Streaming pipeline: lazy CSV reading, imap_unordered, incremental CSV output and running aggregates
+def run_stream(filename, engine, chunksize=32, quiet=False, cache_path=None, collect_stats=False, output_file='solve_results.csv'):
+    print(Fore.YELLOW + f"Streaming puzzles from {filename}. Solving with {cpu_count()} CPU cores ({engine} engine)..." + Style.RESET_ALL)
+    skipped = 0
+
+    # Puzzles are only seen as they stream in, so boards the engine cannot solve are skipped and counted
+    def stream_tasks():
+        nonlocal skipped
+        for i, (puzzle, diff) in enumerate(iter_puzzles(filename)):
+            if engine in NINE_ONLY_ENGINES and len(puzzle) != 9:
+                skipped += 1
+                continue
+            yield i + 1, puzzle, diff, engine, cache_path, collect_stats
+
+    total_puzzles = 0
+    solved_count = 0
+    cache_hits = 0
+    total_time = 0
+    histogram = defaultdict(int)
+    difficulty_stats = defaultdict(lambda: {'solved': 0, 'total': 0, 'time': 0.0})
+    start_time = time.time()
+
+    with open(output_file, 'w', newline='') as f, Pool(processes=cpu_count()) as pool:
+        writer = csv.writer(f)
+        writer.writerow(['Puzzle ID', 'Difficulty', 'Solved', 'Time (s)'] + (COUNTER_COLUMNS if collect_stats else []))
+        for result in pool.imap_unordered(solve_puzzle_task, stream_tasks(), chunksize=chunksize):
+            idx, _, _, solved, solve_time, difficulty, stats = result
+            writer.writerow([idx, difficulty, solved, f"{solve_time:.4f}"] + [stats[name] for name in COUNTER_NAMES if name in stats])
+            total_puzzles += 1
+            cache_hits += stats['cache_hit']
+            total_time += solve_time
+            histogram[histogram_bucket(solve_time)] += 1
+            difficulty_stats[difficulty]['total'] += 1
+            difficulty_stats[difficulty]['time'] += solve_time
+            if solved:
+                solved_count += 1
+                difficulty_stats[difficulty]['solved'] += 1
+            if not quiet:
+                print_puzzle_result(*result[:6])
+    elapsed = time.time() - start_time
+
+    if skipped:
+        print(Fore.RED + f"Skipped {skipped} puzzles that are not 9x9; the {engine} engine only supports 9x9 boards (use --engine ac3 or dlx)." + Style.RESET_ALL)
+    if not total_puzzles:
+        print(Fore.RED + "No valid puzzles loaded. Exiting." + Style.RESET_ALL)
+        return
+
+    print(Fore.YELLOW + "\nSummary:" + Style.RESET_ALL)
+    print(f"Total puzzles attempted: {total_puzzles}")
+    print(f"Total puzzles solved: {solved_count}")
+    print(f"Efficiency rate: {solved_count / total_puzzles * 100:.2f}%")
+    print(f"Total time taken: {total_time:.4f} seconds (wall clock: {elapsed:.4f} seconds)")
+    print(f"Average time per puzzle: {total_time / total_puzzles:.4f} seconds")
+    print(f"Median time per puzzle (approx.): {histogram_median(histogram, total_puzzles):.4f} seconds")
+    print(f"Throughput: {total_puzzles / elapsed if elapsed > 0 else float('inf'):.1f} puzzles/second")
+    if cache_path:
+        print(f"Cache hits: {cache_hits}/{total_puzzles}")
+
+    print(Fore.YELLOW + "\nDifficulty Breakdown:" + Style.RESET_ALL)
+    for diff, stats in difficulty_stats.items():
+        diff_efficiency = (stats['solved'] / stats['total']) * 100
+        print(f"{diff}: {stats['solved']}/{stats['total']} solved ({diff_efficiency:.2f}%), Avg time: {stats['time'] / stats['total']:.4f}s")
 
 # Main function
 def main():
+    parser = argparse.ArgumentParser(description="Enhanced Sudoku Solver")
+    parser.add_argument('--input', default='puzzles.csv', help="CSV file of puzzles (N*N-char string, difficulty)")
+    parser.add_argument('--engine', choices=sorted(ENGINES), default='ac3', help="Solver engine to use")
+    parser.add_argument('--batch', action='store_true', help="Vectorized NumPy propagation over all puzzles, search only for the leftovers")
+    parser.add_argument('--batch-size', type=int, default=10000, help="Puzzles per NumPy chunk in batch mode")
+    parser.add_argument('--stream', action='store_true', help="Stream puzzles with bounded memory, writing results as they complete")
+    parser.add_argument('--chunksize', type=int, default=32, help="Tasks per worker dispatch in streaming mode")
+    parser.add_argument('--quiet', action='store_true', help="Skip printing boards and per-puzzle status")
+    parser.add_argument('--cache', metavar='PATH', help="SQLite file caching solutions of canonicalised 9x9 puzzles")
+    parser.add_argument('--stats', action='store_true', help="Collect search nodes, backtracks, propagation steps and max depth per puzzle")
+    parser.add_argument('--check-unique', action='store_true', help="Count solutions (stopping at the second) instead of solving")
+    args = parser.parse_args()
+
+    if args.batch:
+        from batch_solver import run_batch
+        run_batch(args.input, args.engine, args.batch_size)
+        return
+    if args.check_unique:
+        run_uniqueness_check(args.input, args.chunksize)
+        return
+    if args.stream:
+        run_stream(args.input, args.engine, args.chunksize, args.quiet, args.cache, args.stats)
+        return
+
     # Load puzzles
-    puzzles = load_puzzles('puzzles.csv')
+    puzzles = load_puzzles(args.input)
     if not puzzles:
         print(Fore.RED + "No valid puzzles loaded. Exiting." + Style.RESET_ALL)
         return
     
+    if args.engine in NINE_ONLY_ENGINES and any(len(puzzle) != 9 for puzzle, _ in puzzles):
+        print(Fore.RED + f"The {args.engine} engine only supports 9x9 boards; use --engine ac3 or dlx." + Style.RESET_ALL)
+        return
+
     total_puzzles = len(puzzles)
-    print(Fore.YELLOW + f"Loaded {total_puzzles} puzzles. Solving with {cpu_count()} CPU cores..." + Style.RESET_ALL)
+    print(Fore.YELLOW + f"Loaded {total_puzzles} puzzles. Solving with {cpu_count()} CPU cores ({args.engine} engine)..." + Style.RESET_ALL)
     
     # Prepare tasks
-    tasks = [(i + 1, puzzle, diff) for i, (puzzle, diff) in enumerate(puzzles)]
+    tasks = [(i + 1, puzzle, diff, args.engine, args.cache, args.stats) for i, (puzzle, diff) in enumerate(puzzles)]
     
     # Solve puzzles in parallel
     solved_count = 0
+    cache_hits = 0
     total_time = 0
     solve_times = []
     difficulty_stats = defaultdict(lambda: {'solved': 0, 'total': 0, 'times': []})
@@ -199,12 +549,13 @@ def main():
     # Export results to CSV
     with open('solve_results.csv', 'w', newline='') as f:
         writer = csv.writer(f)
-        writer.writerow(['Puzzle ID', 'Difficulty', 'Solved', 'Time (s)'])
-        for idx, _, _, solved, solve_time, difficulty in sorted(results):
-            writer.writerow([idx, difficulty, solved, f"{solve_time:.4f}"])
+        writer.writerow(['Puzzle ID', 'Difficulty', 'Solved', 'Time (s)'] + (COUNTER_COLUMNS if args.stats else []))
+        for idx, _, _, solved, solve_time, difficulty, stats in sorted(results):
+            writer.writerow([idx, difficulty, solved, f"{solve_time:.4f}"] + [stats[name] for name in COUNTER_NAMES if name in stats])
     
     # Process results
-    for idx, original, solved_board, solved, solve_time, difficulty in sorted(results):
+    for idx, original, solved_board, solved, solve_time, difficulty, stats in sorted(results):
+        cache_hits += stats['cache_hit']
         difficulty_stats[difficulty]['total'] += 1
         difficulty_stats[difficulty]['times'].append(solve_time)
         if solved:
@@ -213,14 +564,8 @@ def main():
         total_time += solve_time
         solve_times.append(solve_time)
         
-        print(Fore.YELLOW + f"\nPuzzle {idx} (Difficulty: {difficulty}):" + Style.RESET_ALL)
-        print("Initial board:")
-        print_board(original)
-        print("Solved board:" if solved else "No solution found:")
-        highlight = {(i, j) for i in range(9) for j in range(9) if original[i][j] == 0}
-        print_board(solved_board, highlight)
-        status = Fore.GREEN + "Solved" if solved else Fore.RED + "Failed"
-        print(f"Status: {status}" + Style.RESET_ALL + f" | Time: {solve_time:.4f} seconds")
+        if not args.quiet:
+            print_puzzle_result(idx, original, solved_board, solved, solve_time, difficulty)
     
     # Summary statistics
     efficiency = (solved_count / total_puzzles) * 100 if total_puzzles > 0 else 0
@@ -233,6 +578,8 @@ def main():
     print(f"Total time taken: {total_time:.4f} seconds")
     print(f"Average time per puzzle: {total_time / total_puzzles:.4f} seconds" if total_puzzles > 0 else "No puzzles processed.")
     print(f"Median time per puzzle: {median_time:.4f} seconds")
+    if args.cache:
+        print(f"Cache hits: {cache_hits}/{total_puzzles}")
     
     print(Fore.YELLOW + "\nDifficulty Breakdown:" + Style.RESET_ALL)
     for diff, stats in difficulty_stats.items():